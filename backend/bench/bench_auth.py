@@ -0,0 +1,53 @@
+"""Per-request overhead of the get_current_user dependency, with and without the JWT cache.
+
+The user is already in the auth user cache, as it is for a steady stream of
+requests, so what is measured is token decoding plus the cache lookups.
+
+    cd backend && python bench/bench_auth.py [--calls 20000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MOSQUES_BACKEND", "memory")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+
+import server  # noqa: E402
+
+
+async def per_call_us(credentials, calls):
+    for _ in range(100):
+        await server.get_current_user(credentials)
+    start = time.perf_counter()
+    for _ in range(calls):
+        await server.get_current_user(credentials)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    user = {"id": "bench", "email": "bench@example.com"}
+    server.user_cache.set(user["email"], user)
+    token = server.create_access_token({"sub": user["email"]})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    print(f"algorithm {server.ALGORITHM}, {args.calls} calls")
+    results = {}
+    for enabled in (False, True):
+        server.JWT_CACHE_ENABLED = enabled
+        results[enabled] = asyncio.run(per_call_us(credentials, args.calls))
+        print(f"JWT cache {'on ' if enabled else 'off'}: {results[enabled]:7.2f} us per request")
+    print(f"saved {results[False] - results[True]:.2f} us per request ({results[False] / results[True]:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
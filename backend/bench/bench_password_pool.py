@@ -0,0 +1,99 @@
+"""p99 latency of /api/quran/verses while a login storm is in progress.
+
+Compares bcrypt verification run inline on the event loop (as login did
+before the password pool) with server.verify_password on the pool. The
+storm is the password check login performs; the verses requests go through
+the ASGI app with authentication overridden, so no MongoDB is needed.
+
+    cd backend && python bench/bench_password_pool.py [--logins 40] [--interval 0.01]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MOSQUES_BACKEND", "memory")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+from password_pool import PasswordPoolBusy  # noqa: E402
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run(mode, logins, interval, hashed):
+    """Latencies (ms) of verses requests sent every ``interval`` seconds during the storm.
+
+    Each latency is measured from when the request was due, not from when
+    the blocked loop got round to sending it.
+    """
+    shed = 0
+
+    async def login():
+        nonlocal shed
+        if mode == "inline":
+            server.pwd_context.verify("password", hashed)
+        else:
+            try:
+                await server.verify_password("password", hashed)
+            except PasswordPoolBusy:
+                shed += 1
+
+    async def verses(client, due, latencies):
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        response = await client.get("/api/quran/verses", params={"surah": 2})
+        assert response.status_code == 200
+        latencies.append((time.perf_counter() - due) * 1000)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(20):
+            await client.get("/api/quran/verses", params={"surah": 2})
+
+        latencies = []
+        requests = []
+        storm = asyncio.gather(*(login() for _ in range(logins)))
+        start = time.perf_counter()
+        # Keep requests coming until the storm is over (or for 2s with no storm)
+        while True:
+            # Catch up on requests that fell due while the loop was blocked
+            while start + len(requests) * interval <= time.perf_counter():
+                due = start + len(requests) * interval
+                requests.append(asyncio.create_task(verses(client, due, latencies)))
+            if storm.done() and time.perf_counter() - start >= 2:
+                break
+            await asyncio.sleep(max(0.0, start + len(requests) * interval - time.perf_counter()))
+        await storm
+        await asyncio.gather(*requests)
+    return latencies, shed, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40, help="logins arriving at once")
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between verses requests")
+    args = parser.parse_args()
+
+    server.app.dependency_overrides[server.get_current_user] = lambda: {"id": "bench", "email": "bench@example.com"}
+    hashed = server.pwd_context.hash("password")
+    print(f"password pool: {server.password_pool.max_workers} workers, max {server.password_pool.max_pending} pending")
+    print(f"{'mode':<8} {'requests':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'shed':>6} {'storm s':>8}")
+    for mode in ("idle", "inline", "pool"):
+        latencies, shed, elapsed = asyncio.run(run(mode, 0 if mode == "idle" else args.logins, args.interval, hashed))
+        print(
+            f"{mode:<8} {len(latencies):8d} {statistics.median(latencies):8.2f} {percentile(latencies, 0.99):8.2f}"
+            f" {max(latencies):8.2f} {shed:6d} {elapsed:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Time to turn large verse and post payloads into a response body.
+
+Three paths per payload:
+
+- stdlib: response_model validation, jsonable_encoder and JSONResponse,
+  which is what FastAPI did for every route before FastJSONResponse;
+- orjson: the same validation, rendered by FastJSONResponse (the app
+  default for routes that return plain data);
+- trusted: server.trusted_response, which skips validation entirely.
+
+    cd backend && python bench/bench_serialization.py [--repeat 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MOSQUES_BACKEND", "memory")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+import server  # noqa: E402
+from fast_json import FastJSONResponse  # noqa: E402
+from models import CommunityPost, QuranVerse  # noqa: E402
+from quran_corpus import QuranCorpus  # noqa: E402
+from quran_metadata import surah_verse_count  # noqa: E402
+
+
+def verse_payload():
+    corpus = QuranCorpus(
+        {
+            "surah_number": surah,
+            "verse_number": verse,
+            "arabic_text": f"بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ {surah}:{verse}",
+            "english_translation": f"In the name of Allah, the Most Gracious, the Most Merciful. {surah}:{verse}",
+            "urdu_translation": f"اللہ کے نام سے جو بہت مہربان، نہایت رحم والا ہے {surah}:{verse}",
+        }
+        for surah in range(1, 115)
+        for verse in range(1, surah_verse_count(surah) + 1)
+    )
+    return corpus.verses(corpus.all_range())
+
+
+def post_payload(count=5000):
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": str(uuid.uuid4()),
+            "user_name": f"User {i}",
+            "content": "Assalamu alaikum! Sharing a reflection from today's halaqa. " * 3,
+            "created_at": now - timedelta(minutes=i),
+            "likes": i % 97,
+            "liked": i % 3 == 0,
+            "comment_count": 3,
+            "comments": [
+                {"id": str(uuid.uuid4()), "user": f"Commenter {j}", "content": "JazakAllah khair", "created_at": now}
+                for j in range(3)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+async def render(path, field, content):
+    if path == "trusted":
+        return server.trusted_response(content).body
+    validated = await serialize_response(field=field, response_content=content)
+    response_class = JSONResponse if path == "stdlib" else FastJSONResponse
+    return response_class(validated).body
+
+
+def ms_per_response(path, field, content, repeat):
+    asyncio.run(render(path, field, content))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = asyncio.run(render(path, field, content))
+    return (time.perf_counter() - start) / repeat * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = [
+        ("6236 verses", List[QuranVerse], verse_payload()),
+        ("5000 posts", List[CommunityPost], post_payload()),
+    ]
+    print(f"{'payload':<12} {'path':<8} {'ms':>9} {'bytes':>10}")
+    for name, model, content in payloads:
+        field = create_response_field(name="response", type_=model)
+        for path in ("stdlib", "orjson", "trusted"):
+            ms, size = ms_per_response(path, field, content, args.repeat)
+            print(f"{name:<12} {path:<8} {ms:9.2f} {size:10d}")
+
+
+if __name__ == "__main__":
+    main()
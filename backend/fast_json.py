@@ -0,0 +1,57 @@
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from typing import Any, Optional
+import hashlib
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any):
+    # Anything orjson can't encode natively (ObjectId, Decimal, ...)
+    return str(value)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    datetime, date, UUID and numpy values are encoded natively, so handlers
+    don't need jsonable_encoder to pre-convert them.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
+class PrecomputedJSON:
+    """A static JSON body serialized once, served with a strong ETag.
+
+    ``respond`` answers a matching If-None-Match with an empty 304, so
+    clients that poll unchanged data cost a header comparison.
+    """
+
+    def __init__(self, content: Any, max_age: int = 86400):
+        if orjson is not None:
+            self.body = orjson.dumps(content)
+        else:
+            self.body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = '"%s"' % hashlib.sha256(self.body).hexdigest()[:32]
+        self.headers = {"ETag": self.etag, "Cache-Control": f"public, max-age={max_age}"}
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
+
+    def respond(self, request: Request) -> Response:
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=self.headers)
+        return Response(self.body, media_type="application/json", headers=self.headers)
@@ -0,0 +1,256 @@
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set
+import asyncio
+import glob
+import json
+import logging
+import os
+import socket
+
+from fast_json import orjson
+
+logger = logging.getLogger(__name__)
+
+
+def encode_frame(event_type: str, data: Any) -> bytes:
+    """One Server-Sent Events frame, serialized once and shared by every subscriber"""
+    if orjson is not None:
+        payload = orjson.dumps(data, default=str)
+    else:
+        payload = json.dumps(data, default=str, separators=(",", ":")).encode("utf-8")
+    return b"event: " + event_type.encode("ascii") + b"\ndata: " + payload + b"\n\n"
+
+
+# Sent in place of a backlog a client couldn't keep up with; it should refetch the feed
+RESYNC_FRAME = encode_frame("resync", {})
+HEARTBEAT_FRAME = b": keep-alive\n\n"
+
+
+class Subscription:
+    """One connected client's outgoing frames.
+
+    The queue is bounded: when a slow client falls ``max_queued`` frames
+    behind, its backlog is replaced by a single resync frame, so memory per
+    connection stays constant however far behind it gets.
+    """
+
+    def __init__(self, max_queued: int = 256):
+        self.max_queued = max_queued
+        self.resyncs = 0
+        self._queue: deque = deque()
+        self._ready = asyncio.Event()
+
+    def push(self, frame: bytes):
+        if len(self._queue) >= self.max_queued:
+            self._queue.clear()
+            self._queue.append(RESYNC_FRAME)
+            self.resyncs += 1
+        self._queue.append(frame)
+        self._ready.set()
+
+    async def next_frames(self, timeout: float) -> List[bytes]:
+        """Everything queued so far, or [HEARTBEAT_FRAME] after ``timeout`` idle seconds"""
+        if not self._queue:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return [HEARTBEAT_FRAME]
+        frames = list(self._queue)
+        self._queue.clear()
+        self._ready.clear()
+        return frames
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+
+class LocalBroker:
+    """Single-worker broker: published frames go straight back to this worker's hub"""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[bytes], None]] = None
+
+    def start(self, deliver: Callable[[bytes], None]):
+        self._deliver = deliver
+
+    def publish(self, frame: bytes):
+        if self._deliver is not None:
+            self._deliver(frame)
+
+    def stop(self):
+        self._deliver = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"broker": "local"}
+
+
+class UnixSocketBroker:
+    """Shares frames between the workers on one host without an external broker.
+
+    Each worker binds a datagram socket in ``directory`` and publishes by
+    sending the frame to every socket found there; it delivers its own frames
+    directly. Sockets of workers that have gone away are removed on the first
+    failed send. A stand-in for Redis/NATS pub-sub until we run one.
+    """
+
+    MAX_FRAME_BYTES = 65000
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, f"worker-{os.getpid()}.sock")
+        self.sent = 0
+        self.received = 0
+        self.oversized = 0
+        self._deliver: Optional[Callable[[bytes], None]] = None
+        self._socket: Optional[socket.socket] = None
+
+    def start(self, deliver: Callable[[bytes], None]):
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self.path)
+        self._socket.setblocking(False)
+        self._deliver = deliver
+        asyncio.get_running_loop().add_reader(self._socket.fileno(), self._receive)
+
+    def _receive(self):
+        while True:
+            try:
+                frame = self._socket.recv(self.MAX_FRAME_BYTES + 1)
+            except BlockingIOError:
+                return
+            self.received += 1
+            self._deliver(frame)
+
+    def publish(self, frame: bytes):
+        if self._deliver is not None:
+            self._deliver(frame)
+        if self._socket is None:
+            return
+        if len(frame) > self.MAX_FRAME_BYTES:
+            # Peers can't receive it in one datagram; they'll catch up on resync
+            self.oversized += 1
+            frame = RESYNC_FRAME
+        for peer in glob.glob(os.path.join(self.directory, "worker-*.sock")):
+            if peer == self.path:
+                continue
+            try:
+                self._socket.sendto(frame, peer)
+                self.sent += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(peer)
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                # Peer's receive buffer is full; it is behind, so it drops this frame
+                logger.warning("Feed broker peer %s is not keeping up", peer)
+
+    def stop(self):
+        if self._socket is not None:
+            asyncio.get_running_loop().remove_reader(self._socket.fileno())
+            self._socket.close()
+            self._socket = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        self._deliver = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "broker": "unix",
+            "directory": self.directory,
+            "sent": self.sent,
+            "received": self.received,
+            "oversized": self.oversized,
+        }
+
+
+class FeedHub:
+    """In-process pub/sub for the community feed stream.
+
+    ``publish`` encodes an event once and hands the frame to the broker,
+    which brings it back to the hub of every worker for fan-out to that
+    worker's subscribers. Like counts go through ``publish_likes`` instead
+    and are coalesced: only the latest count per post is sent, at most
+    once per ``like_interval`` seconds.
+    """
+
+    def __init__(self, broker=None, like_interval: float = 0.5, max_queued: int = 256):
+        self.broker = broker or LocalBroker()
+        self.like_interval = like_interval
+        self.max_queued = max_queued
+        self.published = 0
+        self.delivered = 0
+        self.likes_received = 0
+        self.likes_published = 0
+        self._subscribers: Set[Subscription] = set()
+        self._likes: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.max_queued)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def publish(self, event_type: str, data: Any):
+        self.published += 1
+        self.broker.publish(encode_frame(event_type, data))
+
+    def publish_likes(self, post_id: str, likes: int):
+        self._likes[post_id] = likes
+        self.likes_received += 1
+
+    def deliver(self, frame: bytes):
+        for subscription in self._subscribers:
+            subscription.push(frame)
+        self.delivered += len(self._subscribers)
+
+    def flush_likes(self):
+        if not self._likes:
+            return
+        batch, self._likes = self._likes, {}
+        for post_id, likes in batch.items():
+            self.publish("likes", {"post_id": post_id, "likes": likes})
+        self.likes_published += len(batch)
+
+    async def _run(self):
+        while not self._stopping:
+            await asyncio.sleep(self.like_interval)
+            self.flush_likes()
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self.broker.start(self.deliver)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.flush_likes()
+            self.broker.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            self.broker.stats(),
+            subscribers=len(self._subscribers),
+            published=self.published,
+            delivered=self.delivered,
+            likes_received=self.likes_received,
+            likes_published=self.likes_published,
+            max_queue=max((len(subscription) for subscription in self._subscribers), default=0),
+            resyncs=sum(subscription.resyncs for subscription in self._subscribers),
+        )
@@ -0,0 +1,28 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat, lng, lats, lngs) -> np.ndarray:
+    """Great-circle distances in km from (lat, lng) to every point in (lats, lngs).
+
+    Arguments broadcast, so either side may be a scalar or an array; pass
+    contiguous float64 arrays for the candidates to get a single pass over
+    memory.
+    """
+    lat1 = np.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlng = np.radians(lngs) - np.radians(lng)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def initial_bearing_deg(lat, lng, lats, lngs) -> np.ndarray:
+    """Initial great-circle bearing in degrees clockwise from north, in [0, 360)"""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(lats)
+    dlng = np.radians(lngs) - np.radians(lng)
+    y = np.sin(dlng) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlng)
+    return (np.degrees(np.arctan2(y, x)) + 360) % 360
@@ -0,0 +1,71 @@
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import math
+
+from cache import TTLCache
+from geo import haversine_km
+
+
+class CellCache:
+    """Location-based results shared by everyone inside a lat/lng grid cell.
+
+    Coordinates are quantized to ``cell_degrees`` and the value is computed
+    once at the cell centre, so nearby requests hit the same entry. The
+    answer is therefore exact for the centre and off by at most what the
+    quantity changes over half a cell; ``sample_points`` gives the points
+    to measure that bound against.
+    """
+
+    def __init__(self, cell_degrees: float = 0.01, max_size: int = 50000, ttl: float = 86400.0):
+        self.cell_degrees = cell_degrees
+        self.lng_cells = int(round(360 / cell_degrees))
+        self.cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    def cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (
+            math.floor((lat + 90) / self.cell_degrees),
+            math.floor((lng + 180) / self.cell_degrees) % self.lng_cells,
+        )
+
+    def center(self, cell: Tuple[int, int]) -> Tuple[float, float]:
+        lat_cell, lng_cell = cell
+        lat = min(max(-90 + (lat_cell + 0.5) * self.cell_degrees, -90.0), 90.0)
+        return lat, -180 + (lng_cell + 0.5) * self.cell_degrees
+
+    def get_or_compute(
+        self,
+        lat: float,
+        lng: float,
+        key: Tuple[Hashable, ...],
+        compute: Callable[[float, float], Any],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """Cached value for (cell, *key), computing it at the cell centre on a miss"""
+        cell = self.cell(lat, lng)
+        cache_key = (cell,) + tuple(key)
+        value = self.cache.get(cache_key)
+        if value is None:
+            value = compute(*self.center(cell))
+            self.cache.set(cache_key, value, ttl)
+        return value
+
+    def sample_points(self, lat: float, lng: float) -> Tuple[Tuple[float, float], List[Tuple[float, float]]]:
+        """The centre of (lat, lng)'s cell and its corners and edge midpoints"""
+        center_lat, center_lng = self.center(self.cell(lat, lng))
+        half = self.cell_degrees / 2
+        points = [
+            (min(max(center_lat + dy * half, -90.0), 90.0), center_lng + dx * half)
+            for dy in (-1, 0, 1)
+            for dx in (-1, 0, 1)
+            if dx or dy
+        ]
+        return (center_lat, center_lng), points
+
+    def max_offset_km(self, lat: float) -> float:
+        """Furthest a point in a cell at this latitude can be from the centre"""
+        center_lat, center_lng = self.center(self.cell(lat, 0.0))
+        half = self.cell_degrees / 2
+        edge_lat = center_lat - half if center_lat >= 0 else center_lat + half
+        return float(haversine_km(center_lat, center_lng, edge_lat, center_lng + half))
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.cache.stats(), cell_degrees=self.cell_degrees)
@@ -0,0 +1,146 @@
+from collections import defaultdict
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import math
+
+import numpy as np
+
+from geo import EARTH_RADIUS_KM, haversine_km
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM  # half the circumference
+
+
+def freeze(value: Any) -> Any:
+    """Read-only deep view of nested dicts/lists built from plain JSON-like data"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class DistanceView(Mapping):
+    """A shared, read-only record seen through one query: the record's fields
+    plus the distance computed for this request.
+
+    Only the reference and the distance are stored, so a response costs one
+    small object per result instead of a copy of every record it returns.
+    """
+
+    __slots__ = ("record", "distance")
+
+    def __init__(self, record: Mapping, distance: float):
+        self.record = record
+        self.distance = distance
+
+    def __getitem__(self, key):
+        if key == "distance":
+            return self.distance
+        return self.record[key]
+
+    def __iter__(self):
+        for key in self.record:
+            if key != "distance":
+                yield key
+        yield "distance"
+
+    def __len__(self) -> int:
+        return len(self.record) + ("distance" not in self.record)
+
+
+class GridIndex:
+    """Spatial index bucketing points into fixed-size lat/lng grid cells.
+
+    Coordinates live in contiguous float64 arrays; a radius query gathers the
+    points of the cells overlapping its bounding box and measures them all in
+    one vectorized haversine pass. Nearest-neighbour queries run radius queries with a
+    doubling radius and stop as soon as enough points are inside it, so a
+    dense city resolves in one or two small lookups.
+
+    Records are frozen on the way in, so concurrent queries can hand them out
+    without copying and nothing can write per-request state into them.
+    """
+
+    def __init__(self, records: Sequence[Dict[str, Any]], cell_degrees: float = 0.1):
+        self.records = [freeze(record) for record in records]
+        self.cell_degrees = cell_degrees
+        self.lng_cells = int(round(360 / cell_degrees))
+        self.lats = np.array([r["latitude"] for r in self.records], dtype=np.float64)
+        self.lngs = np.array([r["longitude"] for r in self.records], dtype=np.float64)
+
+        cells = defaultdict(list)
+        for i, record in enumerate(self.records):
+            cells[self._cell(record["latitude"], record["longitude"])].append(i)
+        self.cells: Dict[Tuple[int, int], np.ndarray] = {
+            cell: np.array(indices, dtype=np.intp) for cell, indices in cells.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (
+            math.floor((lat + 90) / self.cell_degrees),
+            math.floor((lng + 180) / self.cell_degrees) % self.lng_cells,
+        )
+
+    def _candidate_cells(self, lat: float, lng: float, radius_km: float):
+        dlat = radius_km / KM_PER_DEGREE
+        lat_lo = max(lat - dlat, -90.0)
+        lat_hi = min(lat + dlat, 90.0)
+        widest = max(abs(lat_lo), abs(lat_hi))
+        if widest >= 89.9 or radius_km >= MAX_DISTANCE_KM:
+            lng_range = range(self.lng_cells)
+        else:
+            dlng = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+            if dlng >= 180:
+                lng_range = range(self.lng_cells)
+            else:
+                lo = math.floor((lng - dlng + 180) / self.cell_degrees)
+                hi = math.floor((lng + dlng + 180) / self.cell_degrees)
+                lng_range = range(lo, hi + 1)
+                if len(lng_range) >= self.lng_cells:
+                    lng_range = range(self.lng_cells)
+
+        lat_range = range(
+            math.floor((lat_lo + 90) / self.cell_degrees),
+            math.floor((lat_hi + 90) / self.cell_degrees) + 1,
+        )
+        if len(lat_range) * len(lng_range) > len(self.cells):
+            # Sparse directory or huge radius: scanning occupied cells is cheaper
+            yield from self.cells.values()
+            return
+        for lat_cell in lat_range:
+            for lng_cell in lng_range:
+                bucket = self.cells.get((lat_cell, lng_cell % self.lng_cells))
+                if bucket is not None:
+                    yield bucket
+
+    def within(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, int]]:
+        """(distance, record index) pairs within radius_km, nearest first"""
+        buckets = list(self._candidate_cells(lat, lng, radius_km))
+        if not buckets:
+            return []
+        candidates = np.concatenate(buckets)
+        distances = haversine_km(lat, lng, self.lats[candidates], self.lngs[candidates])
+        inside = distances <= radius_km
+        candidates = candidates[inside]
+        distances = distances[inside]
+        order = np.lexsort((candidates, distances))
+        return list(zip(distances[order].tolist(), candidates[order].tolist()))
+
+    def nearest(
+        self, lat: float, lng: float, k: int, max_distance_km: Optional[float] = None
+    ) -> List[Tuple[float, int]]:
+        """The k nearest (distance, record index) pairs, optionally within max_distance_km"""
+        if k <= 0 or not self.records:
+            return []
+        limit = MAX_DISTANCE_KM if max_distance_km is None else max_distance_km
+        radius = min(self.cell_degrees * KM_PER_DEGREE, limit)
+        while True:
+            found = self.within(lat, lng, radius)
+            if len(found) >= k or radius >= limit:
+                return found[:k]
+            radius = min(radius * 2, limit)
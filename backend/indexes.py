@@ -0,0 +1,163 @@
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Indexes every route relies on, per collection. Each entry pairs the index
+# with the queries it serves so the startup report shows what is covered.
+INDEXES = {
+    "users": [
+        (
+            IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+            ["auth: register/login/get_current_user find_one by email"],
+        ),
+        (
+            IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+            [
+                "user: update_user_profile",
+                "quran: bookmark/bookmarks/progress",
+                "charity: donate/stats",
+                "duas: favorite/favorites",
+            ],
+        ),
+    ],
+    "donations": [
+        (
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created"),
+            ["charity: donations by user, newest first"],
+        ),
+    ],
+    "reading_events": [
+        (
+            IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], unique=True, name="user_day"),
+            ["quran: progress event buckets per user and day"],
+        ),
+    ],
+    "reading_stats": [
+        (
+            IndexModel([("user_id", ASCENDING)], unique=True, name="user_unique"),
+            ["quran: stats lookup and incremental aggregate updates"],
+        ),
+    ],
+    "mosques": [
+        (
+            IndexModel([("location", GEOSPHERE)], name="location_2dsphere"),
+            ["maps: $geoNear nearby mosques"],
+        ),
+        (
+            IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+            ["maps: mosque listing and timetable batch lookups", "mosque import upserts"],
+        ),
+    ],
+    "posts": [
+        (
+            IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_id"),
+            ["community: keyset-paginated feed, newest first"],
+        ),
+        (
+            IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+            ["community: like/comment by post id", "home feed: hydrating timeline post ids"],
+        ),
+        (
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="user_created_id"),
+            ["home feed: recent posts of followed accounts too big to fan out"],
+        ),
+        (
+            IndexModel(
+                [("group_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                sparse=True,
+                name="group_created_id",
+            ),
+            ["home feed: recent posts of joined groups too big to fan out"],
+        ),
+        (
+            IndexModel([("likes_changed_at", ASCENDING)], sparse=True, name="likes_changed_at"),
+            ["like recount: posts whose like count was flushed since the last recount"],
+        ),
+    ],
+    "comments": [
+        (
+            IndexModel(
+                [("post_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                name="post_created_id",
+            ),
+            ["community: keyset-paginated comments per post, newest first"],
+        ),
+    ],
+    "post_likes": [
+        (
+            IndexModel([("post_id", ASCENDING), ("user_id", ASCENDING)], unique=True, name="post_user_unique"),
+            ["community: one like per user per post, like/unlike and liked-by-me lookups"],
+        ),
+        (
+            IndexModel([("created_at", ASCENDING), ("post_id", ASCENDING)], name="created_post"),
+            ["like recount: posts liked since the last recount"],
+        ),
+    ],
+    "follows": [
+        (
+            IndexModel([("follower_id", ASCENDING), ("followee_id", ASCENDING)], unique=True, name="follower_followee_unique"),
+            ["community: one follow per pair, follow/unfollow", "home feed: which big accounts a reader follows"],
+        ),
+        (
+            IndexModel([("followee_id", ASCENDING)], name="followee"),
+            ["home feed: fan-out of a new post to the author's followers"],
+        ),
+    ],
+    "group_members": [
+        (
+            IndexModel([("group_id", ASCENDING), ("user_id", ASCENDING)], unique=True, name="group_user_unique"),
+            ["community: join/leave", "home feed: fan-out of a group post to its members"],
+        ),
+        (
+            IndexModel([("user_id", ASCENDING), ("group_id", ASCENDING)], name="user_group"),
+            ["community: groups joined by a user", "home feed: which big groups a reader joined"],
+        ),
+    ],
+    "feed_sources": [
+        (
+            IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+            ["home feed: audience counter per user/group, kept by follow/join"],
+        ),
+        (
+            IndexModel([("audience", DESCENDING)], name="audience"),
+            ["home feed: sources too big to fan out"],
+        ),
+    ],
+    "timelines": [
+        (
+            IndexModel([("user_id", ASCENDING)], unique=True, name="user_unique"),
+            ["home feed: one bounded timeline document per user, fan-out pushes and reads"],
+        ),
+    ],
+    "volunteer_registrations": [
+        (
+            IndexModel([("user_id", ASCENDING), ("registered_at", DESCENDING)], name="user_registered"),
+            ["volunteer: registrations by user, newest first"],
+        ),
+    ],
+}
+
+
+async def ensure_indexes(db):
+    """Create any missing indexes and log which queries they cover.
+
+    ``create_indexes`` is a no-op for indexes that already exist with the same
+    definition, so this is safe to run on every startup.
+    """
+    report = {}
+    for collection, specs in INDEXES.items():
+        models = [model for model, _ in specs]
+        try:
+            await db[collection].create_indexes(models)
+        except Exception as exc:
+            logger.error("Index provisioning failed for %s: %s", collection, exc)
+            report[collection] = {"error": str(exc)}
+            continue
+
+        report[collection] = {}
+        for model, covers in specs:
+            name = model.document["name"]
+            report[collection][name] = covers
+            logger.info("%s.%s covers: %s", collection, name, "; ".join(covers))
+    return report
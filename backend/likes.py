@@ -0,0 +1,261 @@
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+import asyncio
+import logging
+import uuid
+
+from write_behind import WriteBehind
+
+logger = logging.getLogger(__name__)
+
+
+class LikeCounter(WriteBehind):
+    """Post likes with per-user dedupe and write-behind like counts.
+
+    Who liked what is a document per (post, user) in ``likes_collection``;
+    its unique index makes like/unlike idempotent, and only a like or unlike
+    that actually changed it moves the count. The count changes themselves
+    are summed per post in this worker -- each worker is one shard of the
+    counter -- and flushed every ``flush_interval`` seconds as a single
+    ``$inc`` per post, so a viral post costs one write per interval per
+    worker instead of one per like. ``merge`` adds the unflushed deltas to
+    posts read back, so a liker sees their own like immediately.
+
+    The post_likes documents are durable at once but the count changes are
+    not: a worker that dies without ``stop`` loses up to ``flush_interval``
+    seconds of them, and ``posts.likes`` drifts from the likes on record.
+    ``recount`` repairs the posts liked or flushed since the last recount,
+    run every ``recount_interval`` seconds by whichever worker holds the
+    lease in ``leases_collection``.
+    """
+
+    LEASE_ID = "like_recount"
+
+    def __init__(
+        self,
+        posts_collection,
+        likes_collection,
+        leases_collection=None,
+        flush_interval: float = 2.0,
+        max_pending_posts: int = 10000,
+        recount_interval: float = 3600.0,
+        recount_settle: float = 60.0,
+        recount_batch_size: int = 1000,
+        on_flushed: Optional[Callable[[Dict[str, int]], None]] = None,
+    ):
+        super().__init__(flush_interval, max_pending_posts)
+        self.posts = posts_collection
+        self.likes = likes_collection
+        self.leases = leases_collection
+        self.recount_interval = recount_interval
+        self.recount_settle = recount_settle
+        self.recount_batch_size = recount_batch_size
+        self.on_flushed = on_flushed
+        self.worker_id = uuid.uuid4().hex
+        self.changes_received = 0
+        self.recounts = 0
+        self.posts_recounted = 0
+        self.posts_corrected = 0
+        self._recount_task: Optional[asyncio.Task] = None
+
+    def _add(self, post_id: str, delta: int):
+        self._pending[post_id] = self._pending.get(post_id, 0) + delta
+        self.changes_received += 1
+        self._added()
+
+    def pending_delta(self, post_id: str) -> int:
+        return self._pending.get(post_id, 0) + self._flushing.get(post_id, 0)
+
+    async def like(self, post_id: str, user_id: str) -> bool:
+        """Record the like; False if the user had already liked the post"""
+        try:
+            await self.likes.insert_one({"post_id": post_id, "user_id": user_id, "created_at": datetime.utcnow()})
+        except DuplicateKeyError:
+            return False
+        self._add(post_id, 1)
+        return True
+
+    async def unlike(self, post_id: str, user_id: str) -> bool:
+        """Remove the like; False if the user hadn't liked the post"""
+        result = await self.likes.delete_one({"post_id": post_id, "user_id": user_id})
+        if result.deleted_count == 0:
+            return False
+        self._add(post_id, -1)
+        return True
+
+    async def liked_by(self, user_id: str, post_ids: Iterable[str]) -> Set[str]:
+        post_ids = list(post_ids)
+        if not post_ids:
+            return set()
+        cursor = self.likes.find({"post_id": {"$in": post_ids}, "user_id": user_id}, {"_id": 0, "post_id": 1})
+        return {like["post_id"] for like in await cursor.to_list(length=None)}
+
+    async def merge(self, posts: List[Dict[str, Any]], user_id: str) -> List[Dict[str, Any]]:
+        """Apply unflushed counts and the reader's own likes to posts read from the database"""
+        liked = await self.liked_by(user_id, (post["id"] for post in posts))
+        for post in posts:
+            post["likes"] = post.get("likes", 0) + self.pending_delta(post["id"])
+            post["liked"] = post["id"] in liked
+        return posts
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne({"id": post_id}, {"$inc": {"likes": delta}, "$set": {"likes_changed_at": now}})
+            for post_id, delta in batch.items()
+            if delta
+        ]
+        if not operations:
+            return
+
+        self._flushing = batch
+        try:
+            await self.posts.bulk_write(operations, ordered=False)
+        except Exception as exc:
+            logger.error("Like count flush failed, will retry: %s", exc)
+            for post_id, delta in batch.items():
+                self._pending[post_id] = self._pending.get(post_id, 0) + delta
+            return
+        finally:
+            self._flushing = {}
+
+        self.flushes += 1
+        self.documents_written += len(operations)
+        await self._report([post_id for post_id, delta in batch.items() if delta])
+
+    async def _report(self, post_ids: List[str]):
+        """Hand the stored counts of just-written posts to ``on_flushed``.
+
+        These are the database's values, the same whichever worker reads
+        them, unlike the per-worker counts ``merge`` produces.
+        """
+        if not self.on_flushed or not post_ids:
+            return
+        try:
+            cursor = self.posts.find({"id": {"$in": post_ids}}, {"_id": 0, "id": 1, "likes": 1})
+            counts = {post["id"]: post["likes"] for post in await cursor.to_list(length=None)}
+            self.on_flushed(counts)
+        except Exception as exc:
+            logger.error("Reporting flushed like counts failed: %s", exc)
+
+    async def recount(self, since: datetime, until: datetime) -> int:
+        """Correct the likes of posts liked or flushed in [since, until); returns how many changed.
+
+        ``until`` should trail the present by more than any worker's flush
+        interval, so every live worker has flushed what it buffered then.
+        Each post's count on record is read in the same aggregation as its
+        stored count, and a post with a like after ``until`` or unflushed
+        changes here is left for the next window. Corrections only apply if
+        the stored count is still the one read, so a flush landing in between
+        is never undone. An unlike after ``until`` that is still buffered is
+        the one change this can't see; its flush marks the post, and the
+        next recount puts it right.
+        """
+        window = {"$gte": since, "$lt": until}
+        post_ids = set(await self.likes.distinct("post_id", {"created_at": window}))
+        post_ids.update(await self.posts.distinct("id", {"likes_changed_at": window}))
+        post_ids = sorted(post_ids)
+
+        corrected = 0
+        changed = []
+        for start in range(0, len(post_ids), self.recount_batch_size):
+            batch = []
+            pipeline = [
+                {"$match": {"id": {"$in": post_ids[start:start + self.recount_batch_size]}}},
+                {"$lookup": {
+                    "from": self.likes.name,
+                    "let": {"post_id": "$id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$post_id", "$$post_id"]}}},
+                        {"$group": {"_id": None, "likes": {"$sum": 1}, "latest": {"$max": "$created_at"}}},
+                    ],
+                    "as": "on_record",
+                }},
+                {"$project": {"_id": 0, "id": 1, "likes": 1, "on_record": 1}},
+            ]
+            async for post in self.posts.aggregate(pipeline):
+                on_record = post["on_record"][0] if post["on_record"] else {"likes": 0, "latest": None}
+                if (on_record["latest"] is not None and on_record["latest"] >= until) or self.pending_delta(post["id"]):
+                    continue
+                stored = post.get("likes", 0)
+                if stored != on_record["likes"]:
+                    batch.append(UpdateOne({"id": post["id"], "likes": stored}, {"$set": {"likes": on_record["likes"]}}))
+                    changed.append(post["id"])
+            if batch:
+                corrected += (await self.posts.bulk_write(batch, ordered=False)).modified_count
+        await self._report(changed)
+
+        self.recounts += 1
+        self.posts_recounted += len(post_ids)
+        self.posts_corrected += corrected
+        if corrected:
+            logger.warning("Like recount corrected %d of %d posts", corrected, len(post_ids))
+        return corrected
+
+    async def _take_lease(self, now: datetime) -> Optional[Dict[str, Any]]:
+        """The recount lease if this worker holds or can take it, else None"""
+        try:
+            return await self.leases.find_one_and_update(
+                {"_id": self.LEASE_ID, "$or": [{"holder": self.worker_id}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"holder": self.worker_id, "expires_at": now + timedelta(seconds=2 * self.recount_interval)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return None
+
+    async def recount_if_leader(self) -> Optional[int]:
+        """Run the next recount window if this worker holds the lease"""
+        now = datetime.utcnow()
+        lease = await self._take_lease(now)
+        if lease is None:
+            return None
+        until = now - timedelta(seconds=self.recount_settle)
+        since = lease.get("recounted_until") or until - timedelta(seconds=self.recount_interval)
+        corrected = await self.recount(since, until)
+        await self.leases.update_one(
+            {"_id": self.LEASE_ID, "holder": self.worker_id}, {"$set": {"recounted_until": until}}
+        )
+        return corrected
+
+    async def _recount_loop(self):
+        while True:
+            await asyncio.sleep(self.recount_interval)
+            try:
+                await self.recount_if_leader()
+            except Exception as exc:
+                logger.error("Like recount failed: %s", exc)
+
+    def start(self):
+        super().start()
+        if self._recount_task is None and self.recount_interval > 0 and self.leases is not None:
+            self._recount_task = asyncio.get_running_loop().create_task(self._recount_loop())
+
+    async def stop(self):
+        if self._recount_task is not None:
+            self._recount_task.cancel()
+            try:
+                await self._recount_task
+            except asyncio.CancelledError:
+                pass
+            self._recount_task = None
+        await super().stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_posts": len(self._pending),
+            "changes_received": self.changes_received,
+            "documents_written": self.documents_written,
+            "flushes": self.flushes,
+            "recounts": self.recounts,
+            "posts_recounted": self.posts_recounted,
+            "posts_corrected": self.posts_corrected,
+            "write_reduction": round(1 - self.documents_written / self.changes_received, 4)
+            if self.changes_received else 0.0,
+        }
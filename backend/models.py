@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import Annotated, List, Optional, Dict, Any
 from datetime import datetime
+from prayer_times import MAX_YEAR
 
 class User(BaseModel):
     id: str
@@ -37,6 +38,23 @@ class QuranVerse(BaseModel):
     english_translation: str
     urdu_translation: Optional[str] = None
     
+# Verse ids are "<surah>:<verse>", so 16 characters is plenty
+VerseId = Annotated[str, Field(max_length=16)]
+
+class BookmarkBatch(BaseModel):
+    add: List[VerseId] = Field([], max_length=500)
+    remove: List[VerseId] = Field([], max_length=500)
+    
+class TimetableBatch(BaseModel):
+    mosque_ids: List[str]
+    year: Optional[int] = Field(None, ge=1, le=MAX_YEAR)
+    month: Optional[int] = Field(None, ge=1, le=12)
+    timezone: str = "UTC"
+    method: str = "mwl"
+    asr: str = "shafi"
+    high_latitude: str = "night_middle"
+    format: str = "json"
+    
 class Mosque(BaseModel):
     id: str
     name: str
@@ -46,6 +64,7 @@ class Mosque(BaseModel):
     phone: Optional[str] = None
     website: Optional[str] = None
     prayer_times: Dict[str, str] = {}
+    distance: Optional[float] = None
     
 class CommunityPost(BaseModel):
     id: str
@@ -53,8 +72,19 @@ class CommunityPost(BaseModel):
     user_name: str
     content: str
     created_at: datetime
+    group_id: Optional[str] = None
     likes: int = 0
-    comments: List[Dict[str, Any]] = []
+    liked: bool = False
+    comment_count: int = 0
+    comments: List[Dict[str, Any]] = []  # newest few only, see /posts/{id}/comments
+    
+class Comment(BaseModel):
+    id: str
+    post_id: str
+    user_id: Optional[str] = None
+    user: str
+    content: str
+    created_at: datetime
     
 class CharityDonation(BaseModel):
     id: str
@@ -0,0 +1,201 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import argparse
+import asyncio
+import json
+import os
+import uuid
+
+from pymongo import UpdateOne
+
+from geo import haversine_km
+from geo_index import GridIndex
+
+# MongoDB measures 2dsphere distances in metres on a sphere of this radius;
+# geo.haversine_km uses the mean radius, so radii are rescaled between the two
+MONGO_EARTH_RADIUS_KM = 6378.1
+
+
+def mosque_document(record: Dict[str, Any]) -> Dict[str, Any]:
+    """A directory record as stored in the mosques collection, with a GeoJSON point"""
+    lat = float(record["latitude"])
+    lng = float(record["longitude"])
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError(f"Coordinates out of range for mosque {record.get('name')!r}: {lat}, {lng}")
+    document = {key: value for key, value in record.items() if key not in ("_id", "distance")}
+    # Records without an id get one derived from name and position, so
+    # re-importing the same file updates them instead of adding copies
+    mosque_id = record.get("id") or uuid.uuid5(uuid.NAMESPACE_URL, f"mosque:{record.get('name')}:{lat:.6f},{lng:.6f}")
+    document.update(
+        id=str(mosque_id),
+        latitude=lat,
+        longitude=lng,
+        location={"type": "Point", "coordinates": [lng, lat]},
+    )
+    return document
+
+
+def read_directory(path: str) -> Iterator[Dict[str, Any]]:
+    """Mosque records from a JSON list, or one JSON object per line for .jsonl files"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def _by_distance(results: List[Tuple[float, Dict[str, Any]]]) -> List[Tuple[float, Dict[str, Any]]]:
+    # Distance, then id, so ties come out the same from every store
+    return sorted(results, key=lambda result: (result[0], result[1]["id"]))
+
+
+class MemoryMosqueStore:
+    """Mosques held in this process and searched through a GridIndex"""
+
+    def __init__(self, records: Iterable[Dict[str, Any]], cell_degrees: float = 0.1):
+        # Index order is id order, which makes it the tie-break among equal distances
+        self.index = GridIndex(sorted(records, key=lambda record: record["id"]), cell_degrees=cell_degrees)
+        self.by_id = {record["id"]: record for record in self.index.records}
+
+    async def nearby(
+        self, lat: float, lng: float, radius_km: float, limit: Optional[int] = None
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        if limit is None:
+            matches = self.index.within(lat, lng, radius_km)
+        else:
+            matches = self.index.nearest(lat, lng, limit, max_distance_km=radius_km)
+        return [(distance, self.index.records[i]) for distance, i in matches]
+
+    async def list(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self.index.records[:limit]
+
+    async def by_ids(self, ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        return {mosque_id: self.by_id[mosque_id] for mosque_id in ids if mosque_id in self.by_id}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "mosques": len(self.index)}
+
+
+class MongoMosqueStore:
+    """Mosques in a collection with a 2dsphere index on ``location``.
+
+    Radius filtering, distance sorting and the limit all run inside
+    ``$geoNear``; distances are then recomputed with geo.haversine_km so
+    they, and the resulting order, match MemoryMosqueStore exactly.
+    """
+
+    PROJECTION = {"_id": 0, "location": 0}
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def nearby(
+        self, lat: float, lng: float, radius_km: float, limit: Optional[int] = None
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        # Same angular radius as radius_km on the mean-radius sphere, plus a
+        # hair of slack; the exact cut is made below with haversine_km
+        max_distance_m = radius_km * 1000 * MONGO_EARTH_RADIUS_KM / 6371.0 * (1 + 1e-9)
+        pipeline = [
+            {
+                "$geoNear": {
+                    "near": {"type": "Point", "coordinates": [lng, lat]},
+                    "distanceField": "_distance",
+                    "maxDistance": max_distance_m,
+                    "spherical": True,
+                    "key": "location",
+                }
+            },
+        ]
+        if limit is not None:
+            # Over-fetch a little so distance ties at the cut resolve by id, as in memory
+            pipeline.append({"$limit": limit + 8})
+        pipeline.append({"$project": dict(self.PROJECTION, _distance=0)})
+
+        documents = await self.collection.aggregate(pipeline).to_list(length=None)
+        if not documents:
+            return []
+        distances = haversine_km(
+            lat, lng,
+            [document["latitude"] for document in documents],
+            [document["longitude"] for document in documents],
+        ).tolist()
+        results = _by_distance(
+            [(distance, document) for distance, document in zip(distances, documents) if distance <= radius_km]
+        )
+        return results[:limit]
+
+    async def list(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({}, self.PROJECTION).sort("id", 1)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(length=None)
+
+    async def by_ids(self, ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        documents = await self.collection.find({"id": {"$in": list(ids)}}, self.PROJECTION).to_list(length=None)
+        return {document["id"]: document for document in documents}
+
+    async def import_records(self, records: Iterable[Dict[str, Any]], batch_size: int = 1000) -> Dict[str, int]:
+        """Upsert records by id in unordered bulk batches; re-importing a file is idempotent"""
+        counts = {"processed": 0, "inserted": 0, "updated": 0}
+
+        async def flush(batch):
+            result = await self.collection.bulk_write(batch, ordered=False)
+            counts["inserted"] += result.upserted_count
+            counts["updated"] += result.modified_count
+
+        batch = []
+        for record in records:
+            document = mosque_document(record)
+            batch.append(UpdateOne({"id": document["id"]}, {"$set": document}, upsert=True))
+            counts["processed"] += 1
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+        return counts
+
+    async def seed(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert records only into an empty collection; returns how many were added"""
+        if await self.collection.find_one({}, {"_id": 1}) is not None:
+            return 0
+        counts = await self.import_records(records)
+        return counts["inserted"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "mongo", "collection": self.collection.name}
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pathlib import Path
+
+    from indexes import INDEXES
+
+    parser = argparse.ArgumentParser(description="Bulk import a mosque directory into MongoDB")
+    parser.add_argument("path", help="JSON list or JSON Lines (.jsonl) file of mosque records")
+    parser.add_argument("--batch-size", type=int, default=1000, help="upserts per bulk write")
+    args = parser.parse_args(argv)
+
+    load_dotenv(Path(__file__).parent / ".env")
+
+    async def run():
+        client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+        # Same setting and default as server.py, so the app reads what was imported
+        collection = client[os.getenv("MONGO_DB_NAME", "myemaan_db")].mosques
+        await collection.create_indexes([model for model, _ in INDEXES["mosques"]])
+        counts = await MongoMosqueStore(collection).import_records(read_directory(args.path), args.batch_size)
+        client.close()
+        return counts
+
+    counts = asyncio.run(run())
+    print(
+        f"Imported {counts['processed']} mosques from {args.path} "
+        f"({counts['inserted']} new, {counts['updated']} updated)"
+    )
+
+
+if __name__ == "__main__":
+    main()
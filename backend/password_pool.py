@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when too many password operations are already queued"""
+
+
+class PasswordPool:
+    """Runs bcrypt hashing/verification on a bounded thread pool.
+
+    bcrypt releases the GIL, so a small thread pool keeps the event loop free
+    without the overhead of a process pool. At most ``max_pending`` operations
+    may be running or queued; beyond that ``PasswordPoolBusy`` is raised so the
+    caller can shed load instead of letting the queue grow.
+    """
+
+    def __init__(self, pwd_context, max_workers: int = 4, max_pending: int = 64):
+        self.pwd_context = pwd_context
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password")
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordPoolBusy()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.pwd_context.verify, plain_password, hashed_password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,78 @@
+from pymongo import monitoring
+import threading
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Tracks connection pool utilization for /api/metrics.
+
+    pymongo calls these hooks from its own threads, so counters are guarded
+    by a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self, max_pool_size: int):
+        with self._lock:
+            return {
+                "max_pool_size": max_pool_size,
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+                "utilization": round(self.checked_out / max_pool_size, 4) if max_pool_size else 0.0,
+            }
@@ -0,0 +1,316 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+PRAYERS = ("fajr", "sunrise", "dhuhr", "asr", "maghrib", "isha")
+# Prayers that count for first_after; sunrise only ends the Fajr window
+TIMED_PRAYERS = ("fajr", "dhuhr", "asr", "maghrib", "isha")
+
+# Fajr/Isha as sun depression angles in degrees, or Isha as minutes after Maghrib
+METHODS = {
+    "mwl": {"name": "Muslim World League", "fajr_angle": 18.0, "isha_angle": 17.0},
+    "isna": {"name": "Islamic Society of North America", "fajr_angle": 15.0, "isha_angle": 15.0},
+    "egypt": {"name": "Egyptian General Authority of Survey", "fajr_angle": 19.5, "isha_angle": 17.5},
+    "umm_al_qura": {"name": "Umm al-Qura University, Makkah", "fajr_angle": 18.5, "isha_minutes": 90},
+    "karachi": {"name": "University of Islamic Sciences, Karachi", "fajr_angle": 18.0, "isha_angle": 18.0},
+}
+
+# Shadow length factor at Asr: object length plus its noon shadow (1) or twice it (2)
+ASR_FACTORS = {"shafi": 1, "hanafi": 2}
+
+# When Fajr/Isha angles are never (or too late) reached, cap them at a share of the night
+HIGH_LATITUDE_RULES = ("none", "night_middle", "one_seventh", "angle_based")
+
+# Solar disc radius plus standard refraction at the horizon
+HORIZON_DEGREES = 0.833
+
+JD_UNIX_EPOCH = 2440587.5
+
+# Above this many location-days, sun positions come from an hourly table
+SUN_TABLE_MIN_POINTS = 20000
+
+
+def _sun_position(jd: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Declination (degrees) and equation of time (hours) at Julian day jd.
+
+    Low-precision solar coordinates from the Astronomical Almanac, good to
+    about a minute of time between 1950 and 2050.
+    """
+    d = jd - 2451545.0
+    g = np.radians(357.529 + 0.98560028 * d)
+    q = 280.459 + 0.98564736 * d
+    ecliptic_lng = np.radians(q + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g))
+    obliquity = np.radians(23.439 - 0.00000036 * d)
+
+    right_ascension = np.degrees(
+        np.arctan2(np.cos(obliquity) * np.sin(ecliptic_lng), np.cos(ecliptic_lng))
+    ) / 15
+    equation_of_time = q / 15 - right_ascension
+    equation_of_time = (equation_of_time + 12) % 24 - 12
+    declination = np.degrees(np.arcsin(np.sin(obliquity) * np.sin(ecliptic_lng)))
+    return declination, equation_of_time
+
+
+def _sun_table(jd_start: float, jd_end: float):
+    """_sun_position interpolated from hourly samples over [jd_start, jd_end].
+
+    Declination and the equation of time change smoothly enough that linear
+    interpolation between hours is exact to well under a second of time, and
+    it is far cheaper than evaluating the series at every location-day.
+    """
+    start = np.floor(jd_start)
+    grid = start + np.arange(int((np.ceil(jd_end) - start) * 24) + 2) / 24
+    declination, equation_of_time = _sun_position(grid)
+    declination_step = np.diff(declination)
+    equation_of_time_step = np.diff(equation_of_time)
+
+    def lookup(jd):
+        # Uniform grid, so the bracketing sample is found by arithmetic
+        position = (jd - start) * 24
+        index = position.astype(np.intp)
+        fraction = position - index
+        return (
+            declination[index] + fraction * declination_step[index],
+            equation_of_time[index] + fraction * equation_of_time_step[index],
+        )
+
+    return lookup
+
+
+def _hour_angle(altitude, declination, lat: float) -> np.ndarray:
+    """Hours between solar noon and the sun reaching altitude; NaN if it never does"""
+    lat_r = np.radians(lat)
+    decl_r = np.radians(declination)
+    cos_h = (np.sin(np.radians(altitude)) - np.sin(lat_r) * np.sin(decl_r)) / (
+        np.cos(lat_r) * np.cos(decl_r)
+    )
+    with np.errstate(invalid="ignore"):
+        return np.degrees(np.arccos(cos_h)) / 15
+
+
+def _solar_times(jd_midnight: np.ndarray, lat: float, params: dict, asr_factor: int,
+                 horizon: float, guess: Dict[str, np.ndarray], sun_position) -> Dict[str, np.ndarray]:
+    """Local mean solar times (hours) for each day, with the sun position
+    evaluated at the guessed time of each prayer"""
+
+    def sun(name):
+        return sun_position(jd_midnight + guess[name] / 24)
+
+    def noon(eqt):
+        return 12 - eqt
+
+    times = {}
+    decl, eqt = sun("fajr")
+    times["fajr"] = noon(eqt) - _hour_angle(-params["fajr_angle"], decl, lat)
+    decl, eqt = sun("sunrise")
+    times["sunrise"] = noon(eqt) - _hour_angle(-horizon, decl, lat)
+    decl, eqt = sun("dhuhr")
+    times["dhuhr"] = noon(eqt)
+    decl, eqt = sun("asr")
+    asr_altitude = np.degrees(np.arctan(1 / (asr_factor + np.tan(np.radians(np.abs(lat - decl))))))
+    times["asr"] = noon(eqt) + _hour_angle(asr_altitude, decl, lat)
+    decl, eqt = sun("maghrib")
+    times["maghrib"] = noon(eqt) + _hour_angle(-horizon, decl, lat)
+    if "isha_minutes" in params:
+        times["isha"] = times["maghrib"] + params["isha_minutes"] / 60
+    else:
+        decl, eqt = sun("isha")
+        times["isha"] = noon(eqt) + _hour_angle(-params["isha_angle"], decl, lat)
+    return times
+
+
+def _adjust_high_latitudes(times: Dict[str, np.ndarray], params: dict, rule: str) -> None:
+    if rule == "none":
+        return
+    night = times["sunrise"] + 24 - times["maghrib"]
+
+    def portion(angle):
+        if rule == "night_middle":
+            return night / 2
+        if rule == "one_seventh":
+            return night / 7
+        return night * angle / 60
+
+    fajr_limit = portion(params["fajr_angle"])
+    fajr = times["fajr"]
+    late = np.isnan(fajr) | (times["sunrise"] - fajr > fajr_limit)
+    times["fajr"] = np.where(late, times["sunrise"] - fajr_limit, fajr)
+
+    if "isha_angle" in params:
+        isha_limit = portion(params["isha_angle"])
+        isha = times["isha"]
+        late = np.isnan(isha) | (isha - times["maghrib"] > isha_limit)
+        times["isha"] = np.where(late, times["maghrib"] + isha_limit, isha)
+
+
+def _validate(method: str, asr: str, high_latitude: str) -> None:
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}; expected one of {', '.join(METHODS)}")
+    if asr not in ASR_FACTORS:
+        raise ValueError(f"Unknown asr juristic method {asr!r}; expected one of {', '.join(ASR_FACTORS)}")
+    if high_latitude not in HIGH_LATITUDE_RULES:
+        raise ValueError(
+            f"Unknown high latitude rule {high_latitude!r}; expected one of {', '.join(HIGH_LATITUDE_RULES)}"
+        )
+
+
+def compute_utc_hours(
+    lat: float,
+    lng: float,
+    days: np.ndarray,
+    utc_offsets: np.ndarray,
+    method: str = "mwl",
+    asr: str = "shafi",
+    high_latitude: str = "night_middle",
+    elevation: float = 0.0,
+) -> Dict[str, np.ndarray]:
+    """Prayer times for many days at one location, vectorized over the days.
+
+    ``days`` are local calendar dates as numpy datetime64[D] and
+    ``utc_offsets`` the location's UTC offset in hours on each of them.
+    Returns, per prayer, hours since UTC midnight of each date (may fall
+    outside 0-24 near the date line); NaN where the sun never reaches the
+    required altitude and no high-latitude rule applies.
+    """
+    _validate(method, asr, high_latitude)
+    params = METHODS[method]
+    horizon = HORIZON_DEGREES + 0.0347 * np.sqrt(max(elevation, 0.0))
+
+    # Shift by whole days so the solar day we compute is the one whose noon
+    # falls on the local calendar date, even across the date line
+    day_shift = np.round((lng / 15 - utc_offsets) / 24)
+    jd_midnight = JD_UNIX_EPOCH + days.astype(np.int64) + day_shift - lng / 360
+
+    sun_position = _sun_position
+    if jd_midnight.size > SUN_TABLE_MIN_POINTS:
+        # Many locations at once: interpolate instead of evaluating every point
+        sun_position = _sun_table(jd_midnight.min() - 1, jd_midnight.max() + 2)
+
+    # First pass from nominal times, second pass refines the sun position at
+    # each computed time
+    nominal = {"fajr": 5.0, "sunrise": 6.0, "dhuhr": 12.0, "asr": 13.0, "maghrib": 18.0, "isha": 18.0}
+    guess = {name: np.full(len(days), hour) for name, hour in nominal.items()}
+    times = _solar_times(jd_midnight, lat, params, ASR_FACTORS[asr], horizon, guess, sun_position)
+    guess = {name: np.where(np.isnan(t), nominal[name], t) for name, t in times.items()}
+    times = _solar_times(jd_midnight, lat, params, ASR_FACTORS[asr], horizon, guess, sun_position)
+
+    _adjust_high_latitudes(times, params, high_latitude)
+    return {name: times[name] - lng / 15 + 24 * day_shift for name in PRAYERS}
+
+
+def utc_offset_hours(day: date, tz: ZoneInfo) -> float:
+    """The zone's UTC offset at local noon, clear of midnight DST transitions"""
+    return datetime(day.year, day.month, day.day, 12, tzinfo=tz).utcoffset().total_seconds() / 3600
+
+
+def _to_datetimes(days: Sequence[date], hours: Dict[str, np.ndarray], tz) -> List[Dict[str, Optional[datetime]]]:
+    schedule = []
+    for i, day in enumerate(days):
+        midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        entry = {}
+        for name in PRAYERS:
+            h = hours[name][i]
+            if np.isnan(h):
+                entry[name] = None
+            else:
+                # Round to the minute, as published timetables do
+                moment = midnight + timedelta(minutes=round(float(h) * 60))
+                entry[name] = moment.astimezone(tz)
+        schedule.append(entry)
+    return schedule
+
+
+def timetable(
+    lat: float,
+    lng: float,
+    start: date,
+    num_days: int,
+    tz: ZoneInfo,
+    method: str = "mwl",
+    asr: str = "shafi",
+    high_latitude: str = "night_middle",
+    elevation: float = 0.0,
+) -> List[Tuple[date, Dict[str, Optional[datetime]]]]:
+    """(date, {prayer: aware local datetime or None}) for num_days from start"""
+    days = [start + timedelta(days=i) for i in range(num_days)]
+    offsets = np.array([utc_offset_hours(d, tz) for d in days])
+    hours = compute_utc_hours(
+        lat, lng, np.array(days, dtype="datetime64[D]"), offsets, method, asr, high_latitude, elevation
+    )
+    return list(zip(days, _to_datetimes(days, hours, tz)))
+
+
+def prayer_times(lat: float, lng: float, day: date, tz: ZoneInfo, **options) -> Dict[str, Optional[datetime]]:
+    return timetable(lat, lng, day, 1, tz, **options)[0][1]
+
+
+def first_after(
+    schedules: Sequence[Dict[str, Optional[datetime]]], moment: datetime
+) -> Tuple[Optional[str], Optional[datetime]]:
+    """The first timed prayer strictly after ``moment`` across consecutive days"""
+    for times in schedules:
+        for name in TIMED_PRAYERS:
+            at = times[name]
+            if at is not None and at > moment:
+                return name, at
+    return None, None
+
+
+# "HH:MM" for every minute of the day, indexed by minute
+CLOCK_LABELS = tuple(f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(1440))
+
+
+# Last year a date range can end in: a day's times and TTLs need the next day
+MAX_YEAR = date.max.year - 1
+MAX_DATE = date(MAX_YEAR, 12, 31)
+
+
+def calendar_days(year: int, month: Optional[int] = None) -> List[date]:
+    """Every date of the month, or of the whole year when month is None"""
+    start = date(year, month or 1, 1)
+    if month is None or month == 12:
+        end = date(year + 1, 1, 1)
+    else:
+        end = date(year, month + 1, 1)
+    return [start + timedelta(days=i) for i in range((end - start).days)]
+
+
+def local_minutes(lat, lng, days: Sequence[date], tz: ZoneInfo, **options) -> Dict[str, np.ndarray]:
+    """Local clock minute (0-1439) of each prayer on each day, -1 where it doesn't occur.
+
+    lat/lng may be column arrays of shape (M, 1) to compute M locations
+    sharing a timezone at once; results are then (M, len(days)).
+    """
+    offsets = np.array([utc_offset_hours(d, tz) for d in days])
+    hours = compute_utc_hours(lat, lng, np.array(days, dtype="datetime64[D]"), offsets, **options)
+    minutes = {}
+    for name, utc_hours in hours.items():
+        local = np.round((utc_hours + offsets) * 60)
+        valid = ~np.isnan(local)
+        minutes[name] = np.where(valid, np.nan_to_num(local) % 1440, -1).astype(np.int64)
+    return minutes
+
+
+def timetable_rows(days: Sequence[date], minutes: Dict[str, np.ndarray]):
+    """One {"date", prayer: "HH:MM" or None} dict per day from a 1-D local_minutes result"""
+    columns = {name: minutes[name].tolist() for name in PRAYERS}
+    for i, day in enumerate(days):
+        row = {"date": day.isoformat()}
+        for name in PRAYERS:
+            minute = columns[name][i]
+            row[name] = CLOCK_LABELS[minute] if minute >= 0 else None
+        yield row
+
+
+def format_clock(moment: Optional[datetime]) -> Optional[str]:
+    """'5:30 AM' style, matching the mosque prayer_times fields"""
+    if moment is None:
+        return None
+    return moment.strftime("%I:%M %p").lstrip("0")
+
+
+def format_duration(delta: timedelta) -> str:
+    minutes = max(int(delta.total_seconds() // 60), 0)
+    return f"{minutes // 60}h {minutes % 60}m"
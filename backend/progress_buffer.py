@@ -0,0 +1,115 @@
+from datetime import datetime
+from pymongo import UpdateOne
+from typing import Any, Callable, Dict, Optional
+import copy
+import logging
+
+from write_behind import WriteBehind
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressWriteBehind(WriteBehind):
+    """Coalesces Quran reading-progress updates and writes them in bulk.
+
+    Each user's latest verse per surah and last_read time are kept in memory
+    and flushed every ``flush_interval`` seconds (or sooner once
+    ``max_pending_users`` users are waiting) as one unordered bulk_write.
+    Reads go through ``merge`` so a user always sees their newest position,
+    flushed or not. Each raw (surah, verse, time) event is also kept until
+    the flush and handed to ``analytics`` (see reading_stats.py), if given.
+    """
+
+    def __init__(
+        self,
+        collection,
+        flush_interval: float = 5.0,
+        max_pending_users: int = 10000,
+        on_flushed: Optional[Callable[[str], None]] = None,
+        analytics=None,
+    ):
+        super().__init__(flush_interval, max_pending_users)
+        self.collection = collection
+        self.on_flushed = on_flushed
+        self.analytics = analytics
+        self.updates_received = 0
+
+    def record(self, user: dict, surah: int, verse: int, when: datetime):
+        entry = self._pending.setdefault(user["id"], {"email": user.get("email"), "surahs": {}, "events": []})
+        entry["surahs"][surah] = verse
+        entry["last_read"] = when
+        entry["events"].append((surah, verse, when))
+        self.updates_received += 1
+        self._added()
+
+    def merge(self, user: dict) -> dict:
+        """Return the user document with any unflushed progress applied"""
+        # Entries being written right now are not yet visible in the database
+        entries = [
+            entry
+            for entry in (self._flushing.get(user.get("id")), self._pending.get(user.get("id")))
+            if entry is not None
+        ]
+        if not entries:
+            return user
+        merged = copy.copy(user)
+        merged["quran_progress"] = dict(user.get("quran_progress") or {})
+        for entry in entries:
+            for surah, verse in entry["surahs"].items():
+                merged["quran_progress"][f"surah_{surah}"] = verse
+            merged["last_read"] = entry["last_read"]
+        return merged
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+
+        operations = []
+        for user_id, entry in batch.items():
+            fields = {f"quran_progress.surah_{surah}": verse for surah, verse in entry["surahs"].items()}
+            fields["last_read"] = entry["last_read"]
+            operations.append(UpdateOne({"id": user_id}, {"$set": fields}))
+
+        self._flushing = batch
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except Exception as exc:
+            logger.error("Reading progress flush failed, will retry: %s", exc)
+            self._requeue(batch)
+            return
+        finally:
+            self._flushing = {}
+
+        self.flushes += 1
+        self.documents_written += len(operations)
+        if self.analytics:
+            try:
+                await self.analytics.apply(batch)
+            except Exception as exc:
+                logger.error("Reading analytics update failed: %s", exc)
+        if self.on_flushed:
+            for entry in batch.values():
+                if entry["email"]:
+                    self.on_flushed(entry["email"])
+
+    def _requeue(self, batch: Dict[str, Dict[str, Any]]):
+        # Newer updates recorded during the failed flush take precedence
+        for user_id, entry in batch.items():
+            newer = self._pending.get(user_id)
+            if newer is None:
+                self._pending[user_id] = entry
+                continue
+            for surah, verse in entry["surahs"].items():
+                newer["surahs"].setdefault(surah, verse)
+            newer["events"][:0] = entry["events"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_users": len(self._pending),
+            "updates_received": self.updates_received,
+            "documents_written": self.documents_written,
+            "flushes": self.flushes,
+            "write_reduction": round(1 - self.documents_written / self.updates_received, 4)
+            if self.updates_received else 0.0,
+        }
@@ -0,0 +1,295 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+TEXT_FIELDS = ("arabic_text", "english_translation", "urdu_translation")
+
+# Binary store layout (header little endian, tables in native byte order):
+#   header        magic, version, field count, verse count, blob offset
+#   surah tables  115 x u32 start position, 115 x u32 verse count
+#   numbers       count x u16 surah, count x u16 verse
+#   offsets       per text field, (count + 1) x u32 into the blob
+#   blob          UTF-8 text; an empty span means the field is missing
+STORE_MAGIC = b"QRN1"
+STORE_VERSION = 1
+STORE_HEADER = struct.Struct("<4sHHII")
+
+
+class QuranCorpus:
+    """Indexed, read-only store of Quran verses.
+
+    Verses are kept in canonical (surah, verse) order in parallel columns, one
+    tuple per text field plus compact integer arrays for the numbers. Each
+    surah occupies a contiguous run of positions, so (surah, verse) lookup is
+    two array reads and a surah slice is just a ``range`` of positions - no
+    verse data is copied until a page is materialized with ``verses``.
+
+    Verse ids are stable ``"<surah>:<verse>"`` strings so bookmarks survive
+    restarts and corpus reloads.
+    """
+
+    def __init__(self, verses: Iterable[Dict[str, Any]]):
+        rows = sorted(verses, key=lambda v: (v["surah_number"], v["verse_number"]))
+
+        self._surah = array("H", (v["surah_number"] for v in rows))
+        self._verse = array("H", (v["verse_number"] for v in rows))
+        self._text = {
+            field: tuple(v.get(field) for v in rows) for field in TEXT_FIELDS
+        }
+
+        # _surah_start[s] is the position of the first verse of surah s and
+        # _surah_len[s] its verse count; surah 0 is unused.
+        self._surah_start = array("i", [0] * 115)
+        self._surah_len = array("H", [0] * 115)
+        for position, surah in enumerate(self._surah):
+            if self._surah_len[surah] == 0:
+                self._surah_start[surah] = position
+            self._surah_len[surah] += 1
+
+        for position in range(len(rows)):
+            surah = self._surah[position]
+            if self._verse[position] != position - self._surah_start[surah] + 1:
+                raise ValueError(f"Surah {surah} is missing verses or has duplicates")
+
+    def __len__(self) -> int:
+        return len(self._surah)
+
+    @staticmethod
+    def verse_id(surah: int, verse: int) -> str:
+        return f"{surah}:{verse}"
+
+    def surah_length(self, surah: int) -> int:
+        if not 1 <= surah <= 114:
+            return 0
+        return self._surah_len[surah]
+
+    def position(self, surah: int, verse: int) -> Optional[int]:
+        if not 1 <= verse <= self.surah_length(surah):
+            return None
+        return self._surah_start[surah] + verse - 1
+
+    def position_of_id(self, verse_id: str) -> Optional[int]:
+        surah, _, verse = verse_id.partition(":")
+        if not (surah.isdigit() and verse.isdigit()):
+            return None
+        return self.position(int(surah), int(verse))
+
+    def verse_at(self, position: int) -> Dict[str, Any]:
+        surah = self._surah[position]
+        verse = self._verse[position]
+        return {
+            "id": self.verse_id(surah, verse),
+            "surah_number": surah,
+            "verse_number": verse,
+            "arabic_text": self._text["arabic_text"][position],
+            "english_translation": self._text["english_translation"][position],
+            "urdu_translation": self._text["urdu_translation"][position],
+        }
+
+    def get(self, surah: int, verse: int) -> Optional[Dict[str, Any]]:
+        position = self.position(surah, verse)
+        return None if position is None else self.verse_at(position)
+
+    def get_by_id(self, verse_id: str) -> Optional[Dict[str, Any]]:
+        position = self.position_of_id(verse_id)
+        return None if position is None else self.verse_at(position)
+
+    def surah_range(self, surah: int, from_verse: int = 1, to_verse: Optional[int] = None) -> range:
+        """Positions of verses from_verse..to_verse (inclusive) of a surah"""
+        length = self.surah_length(surah)
+        start = max(from_verse, 1)
+        end = length if to_verse is None else min(to_verse, length)
+        if start > end:
+            return range(0)
+        base = self._surah_start[surah]
+        return range(base + start - 1, base + end)
+
+    def all_range(self) -> range:
+        return range(len(self))
+
+    def verses(self, positions: range) -> List[Dict[str, Any]]:
+        return [self.verse_at(position) for position in positions]
+
+    def fingerprint(self) -> str:
+        """Identifies the corpus text, so saved search indexes can tell it changed"""
+        digest = hashlib.sha1()
+        for field in TEXT_FIELDS:
+            for text in self._text[field]:
+                digest.update((text or "").encode("utf-8"))
+                digest.update(b"\0")
+        return digest.hexdigest()
+
+    def memory_footprint(self) -> Dict[str, int]:
+        """Approximate bytes held by the corpus, per column"""
+        footprint = {
+            "numbers": sys.getsizeof(self._surah) + sys.getsizeof(self._verse)
+            + sys.getsizeof(self._surah_start) + sys.getsizeof(self._surah_len),
+        }
+        for field, column in self._text.items():
+            footprint[field] = sys.getsizeof(column) + sum(
+                sys.getsizeof(text) for text in column if text is not None
+            )
+        footprint["total"] = sum(footprint.values())
+        return footprint
+
+
+class _MappedColumn:
+    """Read-only text column decoded on demand from the mapped blob"""
+
+    def __init__(self, blob: memoryview, offsets: memoryview):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, position: int) -> Optional[str]:
+        start = self._offsets[position]
+        end = self._offsets[position + 1]
+        if start == end:
+            return None
+        return str(self._blob[start:end], "utf-8")
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self)))
+
+
+class MappedQuranCorpus(QuranCorpus):
+    """QuranCorpus backed by a read-only memory-mapped binary store.
+
+    Every table is a zero-copy view into the mapping, so all worker processes
+    opening the same file share its physical pages and nothing is parsed at
+    startup. Only the verses actually served are decoded into Python strings.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            stat = os.fstat(f.fileno())
+        self._file_identity = (stat.st_size, stat.st_mtime_ns)
+        view = memoryview(self._mmap)
+
+        magic, version, field_count, count, blob_start = STORE_HEADER.unpack_from(view, 0)
+        if magic != STORE_MAGIC or version != STORE_VERSION or field_count != len(TEXT_FIELDS):
+            raise ValueError(f"{path} is not a version {STORE_VERSION} Quran store")
+
+        offset = STORE_HEADER.size
+        self._surah_start = view[offset:offset + 115 * 4].cast("I")
+        offset += 115 * 4
+        self._surah_len = view[offset:offset + 115 * 4].cast("I")
+        offset += 115 * 4
+        self._surah = view[offset:offset + count * 2].cast("H")
+        offset += count * 2
+        self._verse = view[offset:offset + count * 2].cast("H")
+        offset += count * 2
+
+        blob = view[blob_start:]
+        self._text = {}
+        for field in TEXT_FIELDS:
+            offsets = view[offset:offset + (count + 1) * 4].cast("I")
+            offset += (count + 1) * 4
+            self._text[field] = _MappedColumn(blob, offsets)
+
+    def fingerprint(self) -> str:
+        # The store file's size and mtime: hashing the text would decode every
+        # verse at startup, which is what the mapped store exists to avoid
+        return "store:%d:%d" % self._file_identity
+
+    def memory_footprint(self) -> Dict[str, int]:
+        return {"mapped_file": len(self._mmap), "total": len(self._mmap)}
+
+
+def write_store(corpus: QuranCorpus, path: str):
+    """Serialize a corpus into the binary store read by MappedQuranCorpus"""
+    count = len(corpus)
+    blob = bytearray()
+    offset_tables = []
+    for field in TEXT_FIELDS:
+        offsets = array("I", [len(blob)])
+        for text in corpus._text[field]:
+            if text:
+                blob += text.encode("utf-8")
+            offsets.append(len(blob))
+        offset_tables.append(offsets)
+
+    blob_start = STORE_HEADER.size + 115 * 4 * 2 + count * 2 * 2 + len(TEXT_FIELDS) * (count + 1) * 4
+    with open(path, "wb") as f:
+        f.write(STORE_HEADER.pack(STORE_MAGIC, STORE_VERSION, len(TEXT_FIELDS), count, blob_start))
+        f.write(array("I", corpus._surah_start).tobytes())
+        f.write(array("I", corpus._surah_len).tobytes())
+        f.write(array("H", corpus._surah).tobytes())
+        f.write(array("H", corpus._verse).tobytes())
+        for offsets in offset_tables:
+            f.write(offsets.tobytes())
+        f.write(blob)
+
+
+def load_corpus(path: str) -> QuranCorpus:
+    """Load a corpus from a binary store or a JSON list of verse objects.
+
+    JSON objects need ``surah_number``, ``verse_number`` and ``arabic_text``;
+    ``english_translation`` and ``urdu_translation`` are optional. Any ``id``
+    in the file is ignored in favour of the stable ``"<surah>:<verse>"`` id.
+    """
+    with open(path, "rb") as f:
+        is_store = f.read(len(STORE_MAGIC)) == STORE_MAGIC
+    if is_store:
+        return MappedQuranCorpus(path)
+    with open(path, encoding="utf-8") as f:
+        return QuranCorpus(json.load(f))
+
+
+def read_text_source(path: str) -> Dict[tuple, str]:
+    """Read a ``surah|verse|text`` file (Tanzil format), skipping # comments"""
+    texts = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            surah, verse, text = line.split("|", 2)
+            texts[(int(surah), int(verse))] = text
+    return texts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the memory-mapped Quran store")
+    parser.add_argument("output", help="path of the binary store to write")
+    parser.add_argument("--json", help="JSON list of verse objects")
+    parser.add_argument(
+        "--text",
+        action="append",
+        default=[],
+        metavar="FIELD=PATH",
+        help=f"surah|verse|text file for one of {', '.join(TEXT_FIELDS)}",
+    )
+    args = parser.parse_args(argv)
+
+    verses = {}
+    if args.json:
+        with open(args.json, encoding="utf-8") as f:
+            for verse in json.load(f):
+                verses[(verse["surah_number"], verse["verse_number"])] = verse
+    for spec in args.text:
+        field, _, path = spec.partition("=")
+        if field not in TEXT_FIELDS:
+            parser.error(f"unknown field {field!r}")
+        for (surah, verse), text in read_text_source(path).items():
+            row = verses.setdefault((surah, verse), {"surah_number": surah, "verse_number": verse})
+            row[field] = text
+    if not verses:
+        parser.error("no input given, use --json and/or --text")
+
+    corpus = QuranCorpus(verses.values())
+    write_store(corpus, args.output)
+    print(f"Wrote {len(corpus)} verses to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+from bisect import bisect_right
+
+# Verse count of each surah, in surah order (Hafs numbering)
+SURAH_VERSE_COUNTS = (
+    7, 286, 200, 176, 120, 165, 206, 75, 129, 109,
+    123, 111, 43, 52, 99, 128, 111, 110, 98, 135,
+    112, 78, 118, 64, 77, 227, 93, 88, 69, 60,
+    34, 30, 73, 54, 45, 83, 182, 88, 75, 85,
+    54, 53, 89, 59, 37, 35, 38, 29, 18, 45,
+    60, 49, 62, 55, 78, 96, 29, 22, 24, 13,
+    14, 11, 11, 18, 12, 12, 30, 52, 52, 44,
+    28, 28, 20, 56, 40, 31, 50, 40, 46, 42,
+    29, 19, 36, 25, 22, 17, 19, 26, 30, 20,
+    15, 21, 11, 8, 8, 19, 5, 8, 8, 11,
+    11, 8, 3, 9, 5, 4, 7, 3, 6, 3,
+    5, 4, 5, 6,
+)
+
+TOTAL_VERSES = sum(SURAH_VERSE_COUNTS)
+
+# (name, english name, revelation place, first page in the 604-page Madani mushaf)
+SURAH_INFO = (
+    ("Al-Fatihah", "The Opening", "meccan", 1),
+    ("Al-Baqarah", "The Cow", "medinan", 2),
+    ("Al-Imran", "The Family of Imran", "medinan", 50),
+    ("An-Nisa", "The Women", "medinan", 77),
+    ("Al-Ma'idah", "The Table", "medinan", 106),
+    ("Al-An'am", "The Cattle", "meccan", 128),
+    ("Al-A'raf", "The Heights", "meccan", 151),
+    ("Al-Anfal", "The Spoils of War", "medinan", 177),
+    ("At-Tawbah", "The Repentance", "medinan", 187),
+    ("Yunus", "Jonah", "meccan", 208),
+    ("Hud", "Hud", "meccan", 221),
+    ("Yusuf", "Joseph", "meccan", 235),
+    ("Ar-Ra'd", "The Thunder", "medinan", 249),
+    ("Ibrahim", "Abraham", "meccan", 255),
+    ("Al-Hijr", "The Rocky Tract", "meccan", 262),
+    ("An-Nahl", "The Bee", "meccan", 267),
+    ("Al-Isra", "The Night Journey", "meccan", 282),
+    ("Al-Kahf", "The Cave", "meccan", 293),
+    ("Maryam", "Mary", "meccan", 305),
+    ("Ta-Ha", "Ta-Ha", "meccan", 312),
+    ("Al-Anbiya", "The Prophets", "meccan", 322),
+    ("Al-Hajj", "The Pilgrimage", "medinan", 332),
+    ("Al-Mu'minun", "The Believers", "meccan", 342),
+    ("An-Nur", "The Light", "medinan", 350),
+    ("Al-Furqan", "The Criterion", "meccan", 359),
+    ("Ash-Shu'ara", "The Poets", "meccan", 367),
+    ("An-Naml", "The Ant", "meccan", 377),
+    ("Al-Qasas", "The Stories", "meccan", 385),
+    ("Al-Ankabut", "The Spider", "meccan", 396),
+    ("Ar-Rum", "The Romans", "meccan", 404),
+    ("Luqman", "Luqman", "meccan", 411),
+    ("As-Sajdah", "The Prostration", "meccan", 415),
+    ("Al-Ahzab", "The Combined Forces", "medinan", 418),
+    ("Saba", "Sheba", "meccan", 428),
+    ("Fatir", "Originator", "meccan", 434),
+    ("Ya-Sin", "Ya Sin", "meccan", 440),
+    ("As-Saffat", "Those Who Set the Ranks", "meccan", 446),
+    ("Sad", "The Letter Sad", "meccan", 453),
+    ("Az-Zumar", "The Troops", "meccan", 458),
+    ("Ghafir", "The Forgiver", "meccan", 467),
+    ("Fussilat", "Explained in Detail", "meccan", 477),
+    ("Ash-Shura", "The Consultation", "meccan", 483),
+    ("Az-Zukhruf", "The Ornaments of Gold", "meccan", 489),
+    ("Ad-Dukhan", "The Smoke", "meccan", 496),
+    ("Al-Jathiyah", "The Crouching", "meccan", 499),
+    ("Al-Ahqaf", "The Wind-Curved Sandhills", "meccan", 502),
+    ("Muhammad", "Muhammad", "medinan", 507),
+    ("Al-Fath", "The Victory", "medinan", 511),
+    ("Al-Hujurat", "The Rooms", "medinan", 515),
+    ("Qaf", "The Letter Qaf", "meccan", 518),
+    ("Adh-Dhariyat", "The Winnowing Winds", "meccan", 520),
+    ("At-Tur", "The Mount", "meccan", 523),
+    ("An-Najm", "The Star", "meccan", 526),
+    ("Al-Qamar", "The Moon", "meccan", 528),
+    ("Ar-Rahman", "The Beneficent", "medinan", 531),
+    ("Al-Waqi'ah", "The Inevitable", "meccan", 534),
+    ("Al-Hadid", "The Iron", "medinan", 537),
+    ("Al-Mujadilah", "The Pleading Woman", "medinan", 542),
+    ("Al-Hashr", "The Exile", "medinan", 545),
+    ("Al-Mumtahanah", "She That Is to Be Examined", "medinan", 549),
+    ("As-Saff", "The Ranks", "medinan", 551),
+    ("Al-Jumu'ah", "The Congregation", "medinan", 553),
+    ("Al-Munafiqun", "The Hypocrites", "medinan", 554),
+    ("At-Taghabun", "The Mutual Disillusion", "medinan", 556),
+    ("At-Talaq", "The Divorce", "medinan", 558),
+    ("At-Tahrim", "The Prohibition", "medinan", 560),
+    ("Al-Mulk", "The Sovereignty", "meccan", 562),
+    ("Al-Qalam", "The Pen", "meccan", 564),
+    ("Al-Haqqah", "The Reality", "meccan", 566),
+    ("Al-Ma'arij", "The Ascending Stairways", "meccan", 568),
+    ("Nuh", "Noah", "meccan", 570),
+    ("Al-Jinn", "The Jinn", "meccan", 572),
+    ("Al-Muzzammil", "The Enshrouded One", "meccan", 574),
+    ("Al-Muddaththir", "The Cloaked One", "meccan", 575),
+    ("Al-Qiyamah", "The Resurrection", "meccan", 577),
+    ("Al-Insan", "The Man", "medinan", 578),
+    ("Al-Mursalat", "The Emissaries", "meccan", 580),
+    ("An-Naba", "The Tidings", "meccan", 582),
+    ("An-Nazi'at", "Those Who Drag Forth", "meccan", 583),
+    ("Abasa", "He Frowned", "meccan", 585),
+    ("At-Takwir", "The Overthrowing", "meccan", 586),
+    ("Al-Infitar", "The Cleaving", "meccan", 587),
+    ("Al-Mutaffifin", "The Defrauding", "meccan", 587),
+    ("Al-Inshiqaq", "The Sundering", "meccan", 589),
+    ("Al-Buruj", "The Mansions of the Stars", "meccan", 590),
+    ("At-Tariq", "The Nightcomer", "meccan", 591),
+    ("Al-A'la", "The Most High", "meccan", 591),
+    ("Al-Ghashiyah", "The Overwhelming", "meccan", 592),
+    ("Al-Fajr", "The Dawn", "meccan", 593),
+    ("Al-Balad", "The City", "meccan", 594),
+    ("Ash-Shams", "The Sun", "meccan", 595),
+    ("Al-Layl", "The Night", "meccan", 595),
+    ("Ad-Duha", "The Morning Hours", "meccan", 596),
+    ("Ash-Sharh", "The Relief", "meccan", 596),
+    ("At-Tin", "The Fig", "meccan", 597),
+    ("Al-Alaq", "The Clot", "meccan", 597),
+    ("Al-Qadr", "The Power", "meccan", 598),
+    ("Al-Bayyinah", "The Clear Proof", "medinan", 598),
+    ("Az-Zalzalah", "The Earthquake", "medinan", 599),
+    ("Al-Adiyat", "The Courser", "meccan", 599),
+    ("Al-Qari'ah", "The Calamity", "meccan", 600),
+    ("At-Takathur", "The Rivalry in World Increase", "meccan", 600),
+    ("Al-Asr", "The Declining Day", "meccan", 601),
+    ("Al-Humazah", "The Traducer", "meccan", 601),
+    ("Al-Fil", "The Elephant", "meccan", 601),
+    ("Quraysh", "Quraysh", "meccan", 602),
+    ("Al-Ma'un", "The Small Kindnesses", "meccan", 602),
+    ("Al-Kawthar", "The Abundance", "meccan", 602),
+    ("Al-Kafirun", "The Disbelievers", "meccan", 603),
+    ("An-Nasr", "The Divine Support", "medinan", 603),
+    ("Al-Masad", "The Palm Fiber", "meccan", 603),
+    ("Al-Ikhlas", "The Sincerity", "meccan", 604),
+    ("Al-Falaq", "The Daybreak", "meccan", 604),
+    ("An-Nas", "Mankind", "meccan", 604),
+)
+
+# (surah, verse) where each of the 30 juz begins
+JUZ_STARTS = (
+    (1, 1), (2, 142), (2, 253), (3, 93), (4, 24), (4, 148), (5, 82), (6, 111),
+    (7, 88), (8, 41), (9, 93), (11, 6), (12, 53), (15, 1), (17, 1), (18, 75),
+    (21, 1), (23, 1), (25, 21), (27, 56), (29, 46), (33, 31), (36, 28), (39, 32),
+    (41, 47), (46, 1), (51, 31), (58, 1), (67, 1), (78, 1),
+)
+
+
+def surah_verse_count(surah: int) -> int:
+    return SURAH_VERSE_COUNTS[surah - 1] if 1 <= surah <= len(SURAH_VERSE_COUNTS) else 0
+
+
+def juz_of(surah: int, verse: int) -> int:
+    return bisect_right(JUZ_STARTS, (surah, verse))
+
+
+def _build_surahs():
+    surahs = []
+    for number, ((name, english_name, revelation_place, page), verses) in enumerate(
+        zip(SURAH_INFO, SURAH_VERSE_COUNTS), 1
+    ):
+        surahs.append({
+            "number": number,
+            "name": name,
+            "english_name": english_name,
+            "verses": verses,
+            "revelation_place": revelation_place,
+            "juz_start": juz_of(number, 1),
+            "juz_end": juz_of(number, verses),
+            "page": page,
+        })
+    return surahs
+
+
+def _build_juz():
+    juz = []
+    for number, (surah, verse) in enumerate(JUZ_STARTS, 1):
+        if number < len(JUZ_STARTS):
+            next_surah, next_verse = JUZ_STARTS[number]
+            if next_verse > 1:
+                end = (next_surah, next_verse - 1)
+            else:
+                end = (next_surah - 1, surah_verse_count(next_surah - 1))
+        else:
+            end = (114, surah_verse_count(114))
+        juz.append({
+            "number": number,
+            "start": {"surah": surah, "verse": verse},
+            "end": {"surah": end[0], "verse": end[1]},
+        })
+    return juz
+
+
+# Built once at import; served as precomputed bodies by routes/quran.py
+SURAHS = _build_surahs()
+JUZ = _build_juz()
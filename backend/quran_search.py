@@ -0,0 +1,192 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Tuple
+import math
+import os
+import pickle
+import re
+
+from quran_corpus import QuranCorpus, TEXT_FIELDS
+
+INDEX_VERSION = 1
+
+# Tashkeel, Quranic annotation marks, superscript alef and tatweel
+ARABIC_MARKS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+ARABIC_LETTERS = str.maketrans({
+    "أ": "ا",  # alef with hamza above
+    "إ": "ا",  # alef with hamza below
+    "آ": "ا",  # alef with madda
+    "ٱ": "ا",  # alef wasla
+    "ى": "ي",  # alef maksura -> ya
+    "ی": "ي",  # farsi/urdu ya -> ya
+})
+TOKEN = re.compile(r"\w+")
+QUERY_PART = re.compile(r'"([^"]+)"|(\S+)')
+
+# Token positions of different fields never count as adjacent in phrases
+FIELD_GAP = 10000
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def normalize(text: str) -> str:
+    text = ARABIC_MARKS.sub("", text)
+    return text.translate(ARABIC_LETTERS).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(normalize(text))
+
+
+class QuranSearchIndex:
+    """In-memory inverted index over verse text with BM25 ranking.
+
+    Postings map each normalized term to ``{position: token offsets}`` where
+    position is the verse's corpus position, so results resolve through the
+    corpus index. Supports plain terms, ``"exact phrases"`` and ``prefix*``.
+    """
+
+    def __init__(self, corpus: QuranCorpus):
+        postings = defaultdict(dict)
+        for position in corpus.all_range():
+            offset = 0
+            for field in TEXT_FIELDS:
+                text = corpus._text[field][position]
+                if text:
+                    for i, term in enumerate(tokenize(text)):
+                        postings[term].setdefault(position, []).append(offset + i)
+                offset += FIELD_GAP
+
+        self.postings: Dict[str, Dict[int, Tuple[int, ...]]] = {}
+        lengths = [0] * len(corpus)
+        for term, docs in postings.items():
+            self.postings[term] = {position: tuple(offsets) for position, offsets in docs.items()}
+            for position, offsets in docs.items():
+                lengths[position] += len(offsets)
+
+        self.doc_lengths = lengths
+        self.doc_count = len(corpus)
+        self.fingerprint = corpus.fingerprint()
+        self.avg_doc_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        self.terms = sorted(self.postings)
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        start = bisect_left(self.terms, prefix)
+        expanded = []
+        for term in self.terms[start:]:
+            if not term.startswith(prefix):
+                break
+            expanded.append(term)
+        return expanded
+
+    def _expand(self, word: str) -> List[List[str]]:
+        """Index terms for each token of a query word, split like the indexed text.
+
+        Every token is required; a trailing ``*`` makes the last one a prefix.
+        """
+        prefix = word.endswith("*")
+        tokens = tokenize(word[:-1] if prefix else word)
+        expanded = [[token] if token in self.postings else [] for token in tokens]
+        if prefix and tokens:
+            expanded[-1] = self._prefix_terms(tokens[-1])
+        return expanded
+
+    def _idf(self, term: str) -> float:
+        df = len(self.postings[term])
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def _bm25(self, term: str, position: int, tf: int) -> float:
+        norm = 1 - BM25_B + BM25_B * self.doc_lengths[position] / (self.avg_doc_length or 1)
+        return self._idf(term) * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+
+    def _phrase_matches(self, terms: List[str]) -> Dict[int, int]:
+        """Positions containing the phrase, with the number of occurrences"""
+        if any(term not in self.postings for term in terms):
+            return {}
+        candidates = set(self.postings[terms[0]])
+        for term in terms[1:]:
+            candidates &= self.postings[term].keys()
+
+        matches = {}
+        for position in candidates:
+            starts = set(self.postings[terms[0]][position])
+            for i, term in enumerate(terms[1:], 1):
+                starts &= {offset - i for offset in self.postings[term][position]}
+                if not starts:
+                    break
+            if starts:
+                matches[position] = len(starts)
+        return matches
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        """Ranked (position, score) pairs; every query part must match"""
+        parts = []
+        for phrase, word in QUERY_PART.findall(query):
+            if phrase:
+                terms = tokenize(phrase)
+                if not terms:
+                    continue
+                part_scores = defaultdict(float)
+                matches = self._phrase_matches(terms)
+                for position, tf in matches.items():
+                    for term in terms:
+                        part_scores[position] += self._bm25(term, position, tf)
+                parts.append(part_scores)
+            else:
+                for terms in self._expand(word):
+                    part_scores = defaultdict(float)
+                    for term in terms:
+                        for position, offsets in self.postings[term].items():
+                            part_scores[position] += self._bm25(term, position, len(offsets))
+                    parts.append(part_scores)
+
+        scores = None
+        for part_scores in parts:
+            if scores is None:
+                scores = part_scores
+            else:
+                scores = {
+                    position: score + part_scores[position]
+                    for position, score in scores.items()
+                    if position in part_scores
+                }
+            if not scores:
+                return []
+
+        if not scores:
+            return []
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def save(self, path: str):
+        """Write the index atomically so concurrent workers never read a partial file"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((INDEX_VERSION, self.__dict__), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, corpus: QuranCorpus):
+        """Load a saved index, or return None if it is stale or unreadable"""
+        try:
+            with open(path, "rb") as f:
+                version, state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        if version != INDEX_VERSION or state.get("fingerprint") != corpus.fingerprint():
+            return None
+        index = cls.__new__(cls)
+        index.__dict__.update(state)
+        return index
+
+
+def load_or_build(corpus: QuranCorpus, path: str) -> QuranSearchIndex:
+    index = QuranSearchIndex.load(path, corpus) if path and os.path.exists(path) else None
+    if index is None:
+        index = QuranSearchIndex(corpus)
+        if path:
+            try:
+                index.save(path)
+            except OSError:
+                pass
+    return index
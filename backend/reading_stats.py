@@ -0,0 +1,174 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from typing import Any, Dict, List, Set, Tuple
+import logging
+
+from quran_metadata import TOTAL_VERSES, surah_verse_count
+
+logger = logging.getLogger(__name__)
+
+
+def _day(when: datetime) -> str:
+    return when.strftime("%Y-%m-%d")
+
+
+def _or_zero(path: str) -> dict:
+    return {"$ifNull": [path, 0]}
+
+
+def read_steps(position: int, verses: List[int], max_step: int) -> Tuple[Set[int], int]:
+    """Verses read moving through ``verses`` from ``position``, and where that ends.
+
+    A step forward of at most ``max_step`` verses reads everything it
+    passes; any other move (a jump to a bookmark or search result, or back)
+    only reads the verse landed on.
+    """
+    read = set()
+    for verse in verses:
+        if 0 < verse - position <= max_step:
+            read.update(range(position + 1, verse + 1))
+        else:
+            read.add(verse)
+        position = verse
+    return read, position
+
+
+def stats_pipeline(day: str, moves: Dict[int, List[int]], max_step: int) -> List[dict]:
+    """Update pipeline folding one day's moves per surah into the aggregates.
+
+    The verses of each surah already read are kept as a set, so re-reading
+    never inflates the totals and a surah is completed only once all of its
+    verses have been read -- not by landing on its last verse. The first
+    move of a surah starts from the stored position (see ``read_steps``);
+    the rest are worked out here.
+    """
+    prev = {surah: f"_prev_{surah}" for surah in moves}
+    new = {surah: f"_new_{surah}" for surah in moves}
+
+    def first_step(surah: int) -> dict:
+        verse, position = moves[surah][0], f"$position.surah_{surah}"
+        step = {"$subtract": [verse, _or_zero(position)]}
+        return {"$cond": [
+            {"$and": [{"$gt": [step, 0]}, {"$lte": [step, max_step]}]},
+            {"$range": [{"$add": [_or_zero(position), 1]}, verse + 1]},
+            [verse],
+        ]}
+
+    def later_steps(surah: int) -> List[int]:
+        read, _ = read_steps(moves[surah][0], moves[surah][1:], max_step)
+        return sorted(read)
+
+    count = {surah: surah_verse_count(surah) for surah in moves}
+    return [
+        {"$set": {
+            # Stats written before verse sets were kept only have the furthest verse
+            prev[surah]: {"$ifNull": [
+                f"$read.surah_{surah}",
+                {"$range": [1, {"$add": [_or_zero(f"$furthest.surah_{surah}"), 1]}]},
+            ]}
+            for surah in moves
+        }},
+        {"$set": {
+            new[surah]: {"$setUnion": [f"${prev[surah]}", first_step(surah), later_steps(surah)]}
+            for surah in moves
+        }},
+        {"$set": {
+            "_delta": {"$add": [
+                {"$subtract": [{"$size": f"${new[surah]}"}, {"$size": f"${prev[surah]}"}]} for surah in moves
+            ]},
+            "_completed": {"$concatArrays": [
+                {"$cond": [
+                    {"$and": [
+                        {"$lt": [{"$size": f"${prev[surah]}"}, count[surah]]},
+                        {"$gte": [{"$size": f"${new[surah]}"}, count[surah]]},
+                    ]},
+                    [surah],
+                    [],
+                ]}
+                for surah in moves
+            ]},
+        }},
+        {"$set": {
+            **{f"read.surah_{surah}": f"${new[surah]}" for surah in moves},
+            **{f"position.surah_{surah}": verses[-1] for surah, verses in moves.items()},
+            "total_verses_read": {"$add": [_or_zero("$total_verses_read"), "$_delta"]},
+            "surahs_completed": {"$concatArrays": [{"$ifNull": ["$surahs_completed", []]}, "$_completed"]},
+            f"daily.{day}.verses": {"$add": [_or_zero(f"$daily.{day}.verses"), "$_delta"]},
+            f"daily.{day}.surahs_completed": {
+                "$add": [_or_zero(f"$daily.{day}.surahs_completed"), {"$size": "$_completed"}]
+            },
+        }},
+        {"$unset": [
+            "_delta", "_completed", *prev.values(), *new.values(), *(f"furthest.surah_{surah}" for surah in moves)
+        ]},
+    ]
+
+
+class ReadingStats:
+    """Append-only reading events plus incrementally maintained aggregates.
+
+    Events land in per-user, per-day bucket documents. Each batch of events
+    also updates a single per-user stats document in place, so reading the
+    stats is one indexed lookup no matter how long the history is.
+    """
+
+    def __init__(self, events_collection, stats_collection, max_step: int = 20):
+        self.events = events_collection
+        self.stats = stats_collection
+        self.max_step = max_step
+
+    async def apply(self, batch: Dict[str, Dict[str, Any]]):
+        """Store the events of a progress flush batch and fold them into the aggregates"""
+        event_ops = []
+        stats_ops = []
+        for user_id, entry in batch.items():
+            by_day = defaultdict(list)
+            for surah, verse, when in entry.get("events", []):
+                # The route rejects these; never let one inflate the totals
+                if surah_verse_count(surah) == 0 or verse < 1:
+                    continue
+                verse = min(verse, surah_verse_count(surah))
+                by_day[_day(when)].append({"surah": surah, "verse": verse, "at": when})
+
+            for day, events in sorted(by_day.items()):
+                event_ops.append(UpdateOne(
+                    {"user_id": user_id, "day": day},
+                    {"$push": {"events": {"$each": events}}, "$inc": {"count": len(events)}},
+                    upsert=True,
+                ))
+                moves = defaultdict(list)
+                for event in events:
+                    moves[event["surah"]].append(event["verse"])
+                stats_ops.append(
+                    UpdateOne({"user_id": user_id}, stats_pipeline(day, moves, self.max_step), upsert=True)
+                )
+
+        if event_ops:
+            await self.events.bulk_write(event_ops, ordered=False)
+        if stats_ops:
+            # Ordered, since a user's days must be applied oldest first
+            await self.stats.bulk_write(stats_ops, ordered=True)
+
+    async def get(self, user_id: str, days: int = 7) -> Dict[str, Any]:
+        today = datetime.utcnow().date()
+        recent_days = [(today - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+        projection = {"_id": 0, "total_verses_read": 1, "surahs_completed": 1}
+        projection.update({f"daily.{day}": 1 for day in recent_days})
+
+        doc = await self.stats.find_one({"user_id": user_id}, projection) or {}
+        daily = doc.get("daily", {})
+        total = doc.get("total_verses_read", 0)
+        return {
+            "total_verses_read": total,
+            "completion_percentage": round(total / TOTAL_VERSES * 100, 2),
+            "surahs_completed": len(doc.get("surahs_completed", [])),
+            "daily": [
+                {
+                    "date": day,
+                    "verses_read": daily.get(day, {}).get("verses", 0),
+                    "surahs_completed": daily.get(day, {}).get("surahs_completed", 0),
+                }
+                for day in recent_days
+            ],
+        }
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List
-from server import db, get_current_user
+from server import db, stale_read_db, get_current_user, invalidate_user
 from models import CharityDonation
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
 import random
 
 router = APIRouter(prefix="/api/charity", tags=["charity"])
@@ -104,8 +104,10 @@ async def make_donation(
         {"id": current_user["id"]},
         {"$inc": {"charity_total": amount}}
     )
+    invalidate_user(current_user)
+    await db.donations.insert_one(donation_data)
     
-    # In real app, process payment and save donation
+    # In real app, process payment
     return {
         "message": "Donation successful",
         "donation_id": donation_id,
@@ -114,33 +116,15 @@ async def make_donation(
     }
 
 @router.get("/donations", response_model=List[CharityDonation])
-async def get_user_donations(current_user: dict = Depends(get_current_user)):
-    # Mock user donations
-    donations = [
-        {
-            "id": str(uuid.uuid4()),
-            "user_id": current_user["id"],
-            "organization": "Islamic Relief Worldwide",
-            "amount": 100.0,
-            "currency": "USD",
-            "created_at": datetime.utcnow() - timedelta(days=5),
-            "category": "humanitarian"
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "user_id": current_user["id"],
-            "organization": "Local Masjid Fund",
-            "amount": 50.0,
-            "currency": "USD",
-            "created_at": datetime.utcnow() - timedelta(days=15),
-            "category": "community"
-        }
-    ]
-    return donations
+async def get_user_donations(limit: int = Query(50, ge=1, le=200), current_user: dict = Depends(get_current_user)):
+    cursor = db.donations.find({"user_id": current_user["id"]}, {"_id": 0}).sort("created_at", -1).limit(limit)
+    return await cursor.to_list(length=None)
 
 @router.get("/stats")
 async def get_charity_stats(current_user: dict = Depends(get_current_user)):
-    user = await db.users.find_one({"id": current_user["id"]})
+    user = await stale_read_db.users.find_one({"id": current_user["id"]})
+    # A secondary may not have a just-registered user yet
+    user = user or current_user
     total_donated = user.get("charity_total", 0)
     
     return {
@@ -1,18 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from server import db, get_current_user
-from models import CommunityPost
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pymongo import UpdateOne
+from typing import List, Optional
+from server import db, get_current_user, get_stream_user, trusted_response
+from models import Comment, CommunityPost
+from pagination import keyset_filter, keyset_page, now_ms
+from likes import LikeCounter
+from cache import TTLCache
+from feed_hub import FeedHub, LocalBroker, UnixSocketBroker
+from timelines import TimelineFanout
+import logging
+import os
+import re
 import uuid
 from datetime import datetime, timedelta
 import random
 
 router = APIRouter(prefix="/api/community", tags=["community"])
+logger = logging.getLogger(__name__)
 
-# Mock community posts
+POSTS_MAX_PAGE_SIZE = int(os.getenv("POSTS_MAX_PAGE_SIZE", 100))
+
+def publish_like_counts(counts):
+    # Stored counts after a flush, so every worker broadcasts the same value
+    for post_id, likes in counts.items():
+        feed_hub.publish_likes(post_id, likes)
+
+# Likes are deduped per user in post_likes; counts reach posts.likes in batched $inc writes
+like_counter = LikeCounter(
+    db.posts,
+    db.post_likes,
+    db.leases,
+    flush_interval=float(os.getenv("LIKE_FLUSH_INTERVAL_SECONDS", 2)),
+    max_pending_posts=int(os.getenv("LIKE_BUFFER_MAX_POSTS", 10000)),
+    recount_interval=float(os.getenv("LIKE_RECOUNT_INTERVAL_SECONDS", 3600)),
+    recount_settle=float(os.getenv("LIKE_RECOUNT_SETTLE_SECONDS", 60)),
+    on_flushed=publish_like_counts,
+)
+# Posts carry a comment_count and only their newest comments; the rest are
+# paged from the comments collection
+FEED_LATEST_COMMENTS = int(os.getenv("FEED_LATEST_COMMENTS", 3))
+
+# Home feeds are precomputed: a new post is pushed onto the bounded timeline of
+# each follower/group member, except for authors and groups whose audience is
+# FANOUT_MAX_AUDIENCE or more -- those are merged in when the feed is read
+timelines = TimelineFanout(
+    db,
+    max_entries=int(os.getenv("TIMELINE_MAX_ENTRIES", 500)),
+    max_fanout=int(os.getenv("FANOUT_MAX_AUDIENCE", 10000)),
+    backfill=int(os.getenv("TIMELINE_BACKFILL_POSTS", 20)),
+)
+
+# Ids of posts known to exist, so repeat likes skip the existence lookup
+known_posts = TTLCache(max_size=100000, ttl=300)
+
+# Mock community posts, seeded into an empty posts collection
 MOCK_POSTS = [
     {
-        "id": str(uuid.uuid4()),
-        "user_id": str(uuid.uuid4()),
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, "post:Ahmed Hassan")),
+        "user_id": str(uuid.uuid5(uuid.NAMESPACE_URL, "user:Ahmed Hassan")),
         "user_name": "Ahmed Hassan",
         "content": "Subhan'Allah! Just witnessed the most beautiful sunset after Maghrib prayer. Alhamdulillah for these blessed moments.",
         "created_at": datetime.utcnow() - timedelta(hours=2),
@@ -23,8 +69,8 @@ MOCK_POSTS = [
         ]
     },
     {
-        "id": str(uuid.uuid4()),
-        "user_id": str(uuid.uuid4()),
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, "post:Sister Aisha")),
+        "user_id": str(uuid.uuid5(uuid.NAMESPACE_URL, "user:Sister Aisha")),
         "user_name": "Sister Aisha",
         "content": "Reminder: Tonight is the night of power (Laylat al-Qadr). Let's make the most of these blessed hours with dhikr and dua.",
         "created_at": datetime.utcnow() - timedelta(hours=5),
@@ -36,8 +82,8 @@ MOCK_POSTS = [
         ]
     },
     {
-        "id": str(uuid.uuid4()),
-        "user_id": str(uuid.uuid4()),
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, "post:Brother Bilal")),
+        "user_id": str(uuid.uuid5(uuid.NAMESPACE_URL, "user:Brother Bilal")),
         "user_name": "Brother Bilal",
         "content": "Completed my first Quran recitation this month! Alhamdulillah. The journey has been so spiritually rewarding.",
         "created_at": datetime.utcnow() - timedelta(hours=8),
@@ -48,8 +94,8 @@ MOCK_POSTS = [
         ]
     },
     {
-        "id": str(uuid.uuid4()),
-        "user_id": str(uuid.uuid4()),
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, "post:Ustadha Zaynab")),
+        "user_id": str(uuid.uuid5(uuid.NAMESPACE_URL, "user:Ustadha Zaynab")),
         "user_name": "Ustadha Zaynab",
         "content": "Beautiful hadith to reflect on: 'The believer is not one who eats his fill while his neighbor goes hungry.' - Prophet Muhammad (PBUH)",
         "created_at": datetime.utcnow() - timedelta(hours=12),
@@ -62,53 +108,288 @@ MOCK_POSTS = [
     }
 ]
 
+# Mock community groups; ids are stable so memberships survive restarts
+MOCK_GROUPS = [
+    {
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, "group:Young Muslims Network")),
+        "name": "Young Muslims Network",
+        "description": "Community for Muslim youth aged 18-35",
+        "members": 234,
+        "category": "Youth"
+    },
+    {
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, "group:Sisters Study Circle")),
+        "name": "Sisters Study Circle",
+        "description": "Islamic education and sisterhood",
+        "members": 89,
+        "category": "Education"
+    },
+    {
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, "group:Business Professionals")),
+        "name": "Business Professionals",
+        "description": "Networking for Muslim entrepreneurs",
+        "members": 156,
+        "category": "Professional"
+    },
+    {
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, "group:Family Support Network")),
+        "name": "Family Support Network",
+        "description": "Support and resources for Muslim families",
+        "members": 67,
+        "category": "Family"
+    }
+]
+GROUPS_BY_ID = {group["id"]: group for group in MOCK_GROUPS}
+
+# Live feed events (new posts, like counts, comments) pushed to connected
+# clients over SSE. FEED_BROKER=unix shares them between workers on one host.
+FEED_BROKER = os.getenv("FEED_BROKER", "local")
+feed_hub = FeedHub(
+    UnixSocketBroker(os.getenv("FEED_BROKER_DIR", "/tmp/myemaan-feed"))
+    if FEED_BROKER == "unix" else LocalBroker(),
+    like_interval=float(os.getenv("FEED_LIKE_INTERVAL_SECONDS", 0.5)),
+    max_queued=int(os.getenv("FEED_MAX_QUEUED_EVENTS", 256)),
+)
+FEED_HEARTBEAT_SECONDS = float(os.getenv("FEED_HEARTBEAT_SECONDS", 15))
+
+@router.on_event("startup")
+async def start_like_counter():
+    like_counter.start()
+    feed_hub.start()
+
+@router.on_event("shutdown")
+async def flush_like_counter():
+    await like_counter.stop()
+    await feed_hub.stop()
+
+def mock_comment_time(age: str) -> datetime:
+    # "45m ago" / "3h ago" as shown on the mock posts
+    amount, unit = re.match(r"(\d+)([mh])", age).groups()
+    delta = timedelta(minutes=int(amount)) if unit == "m" else timedelta(hours=int(amount))
+    return now_ms() - delta
+
+def split_comments(post: dict):
+    """A mock post with embedded comments as a bounded post document plus comment documents"""
+    comments = [
+        {
+            "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"comment:{post['id']}:{i}")),
+            "post_id": post["id"],
+            "user_id": None,
+            "user": comment["user"],
+            "content": comment["content"],
+            "created_at": mock_comment_time(comment["time"]),
+        }
+        for i, comment in enumerate(post["comments"])
+    ]
+    previews = [{key: value for key, value in comment.items() if key != "post_id"} for comment in comments]
+    document = dict(post, comment_count=len(comments), comments=previews[-FEED_LATEST_COMMENTS:])
+    return document, comments
+
+async def seed_posts():
+    """Insert the mock posts and their comments into an empty posts collection.
+
+    Called by the server after ensure_indexes, so the unique id indexes
+    exist; the upserts keyed by id make workers starting together harmless.
+    """
+    try:
+        if await db.posts.find_one({}, {"_id": 1}) is None:
+            posts, comments = [], []
+            for post in MOCK_POSTS:
+                document, post_comments = split_comments(post)
+                # No likes are on record for the mock posts, so their counts start at 0
+                document["likes"] = 0
+                posts.append(UpdateOne({"id": document["id"]}, {"$setOnInsert": document}, upsert=True))
+                comments.extend(
+                    UpdateOne({"id": comment["id"]}, {"$setOnInsert": comment}, upsert=True)
+                    for comment in post_comments
+                )
+            await db.posts.bulk_write(posts, ordered=False)
+            await db.comments.bulk_write(comments, ordered=False)
+    except Exception as exc:
+        logger.error("Seeding posts failed: %s", exc)
+
 @router.get("/posts", response_model=List[CommunityPost])
-async def get_community_posts(skip: int = 0, limit: int = 10, current_user: dict = Depends(get_current_user)):
-    # In a real app, this would fetch from database with pagination
-    return MOCK_POSTS[skip:skip + limit]
+async def get_community_posts(before: Optional[str] = None, limit: int = 10, current_user: dict = Depends(get_current_user)):
+    """Newest posts first. Each page's X-Next-Cursor header, passed back as
+    ``before``, fetches the following page; the last page has none."""
+    limit = max(1, min(limit, POSTS_MAX_PAGE_SIZE))
+    query = {}
+    if before:
+        try:
+            query = keyset_filter(before)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    posts, headers = await keyset_page(db.posts, query, limit)
+    await like_counter.merge(posts, current_user["id"])
+    return trusted_response(posts, headers=headers)
+
+@router.get("/feed", response_model=List[CommunityPost])
+async def get_home_feed(before: Optional[str] = None, limit: int = 10, current_user: dict = Depends(get_current_user)):
+    """The user's own posts and those of people they follow and groups they
+    joined, newest first, paged like /posts via X-Next-Cursor."""
+    limit = max(1, min(limit, POSTS_MAX_PAGE_SIZE))
+    try:
+        posts, headers = await timelines.read(current_user["id"], before, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    await like_counter.merge(posts, current_user["id"])
+    return trusted_response(posts, headers=headers)
+
+async def fan_out_post(post: dict):
+    try:
+        await timelines.fan_out(post)
+    except Exception as exc:
+        # The post is saved and on /posts; only followers' home feeds miss it
+        logger.error("Timeline fan-out failed for post %s: %s", post["id"], exc)
 
 @router.post("/posts")
-async def create_post(content: str, current_user: dict = Depends(get_current_user)):
+async def create_post(
+    content: str,
+    background_tasks: BackgroundTasks,
+    group_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    if group_id is not None and group_id not in GROUPS_BY_ID:
+        raise HTTPException(status_code=404, detail="Group not found")
     post_id = str(uuid.uuid4())
     post_data = {
         "id": post_id,
         "user_id": current_user["id"],
         "user_name": current_user["full_name"],
         "content": content,
-        "created_at": datetime.utcnow(),
+        "created_at": now_ms(),
         "likes": 0,
+        "comment_count": 0,
         "comments": []
     }
+    if group_id is not None:
+        post_data["group_id"] = group_id
     
-    # In a real app, save to database
-    MOCK_POSTS.insert(0, post_data)
+    await db.posts.insert_one(post_data)
+    post_data.pop("_id", None)
+    feed_hub.publish("post", post_data)
+    # Timelines are written after the response is sent
+    background_tasks.add_task(fan_out_post, post_data)
     
     return {"message": "Post created successfully", "post_id": post_id}
 
+@router.post("/users/{user_id}/follow")
+async def follow_user(user_id: str, current_user: dict = Depends(get_current_user)):
+    if user_id == current_user["id"]:
+        raise HTTPException(status_code=400, detail="You cannot follow yourself")
+    # Authors of the seeded posts have no account but can still be followed
+    if (
+        await db.users.find_one({"id": user_id}, {"_id": 1}) is None
+        and await db.posts.find_one({"user_id": user_id}, {"_id": 1}) is None
+    ):
+        raise HTTPException(status_code=404, detail="User not found")
+    changed = await timelines.follow(current_user["id"], user_id)
+    return {"message": "Followed" if changed else "No change", "following": True}
+
+@router.delete("/users/{user_id}/follow")
+async def unfollow_user(user_id: str, current_user: dict = Depends(get_current_user)):
+    changed = await timelines.unfollow(current_user["id"], user_id)
+    return {"message": "Unfollowed" if changed else "No change", "following": False}
+
+async def post_exists(post_id: str) -> bool:
+    if known_posts.get(post_id):
+        return True
+    if await db.posts.find_one({"id": post_id}, {"_id": 1}) is None:
+        return False
+    known_posts.set(post_id, True)
+    return True
+
+async def like_state(post_id: str, user_id: str, changed: bool, message: str):
+    post = await db.posts.find_one({"id": post_id}, {"_id": 0, "id": 1, "likes": 1})
+    if post is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    await like_counter.merge([post], user_id)
+    return {"message": message if changed else "No change", "likes": post["likes"], "liked": post["liked"]}
+
 @router.post("/posts/{post_id}/like")
 async def like_post(post_id: str, current_user: dict = Depends(get_current_user)):
-    # Find post and increment likes
-    for post in MOCK_POSTS:
-        if post["id"] == post_id:
-            post["likes"] += 1
-            return {"message": "Post liked", "likes": post["likes"]}
-    
-    raise HTTPException(status_code=404, detail="Post not found")
+    if not await post_exists(post_id):
+        raise HTTPException(status_code=404, detail="Post not found")
+    changed = await like_counter.like(post_id, current_user["id"])
+    return await like_state(post_id, current_user["id"], changed, "Post liked")
+
+@router.delete("/posts/{post_id}/like")
+async def unlike_post(post_id: str, current_user: dict = Depends(get_current_user)):
+    changed = await like_counter.unlike(post_id, current_user["id"])
+    return await like_state(post_id, current_user["id"], changed, "Post unliked")
 
 @router.post("/posts/{post_id}/comment")
 async def add_comment(post_id: str, comment_content: str, current_user: dict = Depends(get_current_user)):
-    # Find post and add comment
-    for post in MOCK_POSTS:
-        if post["id"] == post_id:
-            comment = {
-                "user": current_user["full_name"],
-                "content": comment_content,
-                "time": "now"
-            }
-            post["comments"].append(comment)
-            return {"message": "Comment added", "comment": comment}
-    
-    raise HTTPException(status_code=404, detail="Post not found")
+    comment = {
+        "id": str(uuid.uuid4()),
+        "user_id": current_user["id"],
+        "user": current_user["full_name"],
+        "content": comment_content,
+        "created_at": now_ms(),
+    }
+    # The post keeps a count and a fixed-size window of the newest comments
+    result = await db.posts.update_one(
+        {"id": post_id},
+        {
+            "$inc": {"comment_count": 1},
+            "$push": {"comments": {"$each": [comment], "$slice": -FEED_LATEST_COMMENTS}},
+        },
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Post not found")
+    await db.comments.insert_one(dict(comment, post_id=post_id))
+    feed_hub.publish("comment", dict(comment, post_id=post_id))
+    return trusted_response({"message": "Comment added", "comment": comment})
+
+@router.get("/posts/{post_id}/comments", response_model=List[Comment])
+async def get_post_comments(
+    post_id: str,
+    before: Optional[str] = None,
+    limit: int = 20,
+    current_user: dict = Depends(get_current_user)
+):
+    """A post's comments, newest first, paged like the feed via X-Next-Cursor"""
+    if not await post_exists(post_id):
+        raise HTTPException(status_code=404, detail="Post not found")
+    limit = max(1, min(limit, POSTS_MAX_PAGE_SIZE))
+    query = {"post_id": post_id}
+    if before:
+        try:
+            query = keyset_filter(before, query)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    comments, headers = await keyset_page(db.comments, query, limit)
+    return trusted_response(comments, headers=headers)
+
+@router.get("/stream")
+async def stream_feed(current_user: dict = Depends(get_stream_user)):
+    """Server-Sent Events: post, likes and comment events as they happen.
+
+    Browsers open it with EventSource and ?token= from POST
+    /api/auth/stream-token (see communityAPI.openFeedStream in the web
+    client); other clients can send their bearer header instead. The token
+    is only checked on connect, so fetch a fresh one before reconnecting.
+
+    A client that falls too far behind receives a resync event in place of
+    the missed ones and should refetch /posts.
+    """
+    subscription = feed_hub.subscribe()
+
+    async def frames():
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                yield b"".join(await subscription.next_frames(FEED_HEARTBEAT_SECONDS))
+        finally:
+            feed_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/events")
 async def get_community_events(current_user: dict = Depends(get_current_user)):
@@ -142,34 +423,20 @@ async def get_community_events(current_user: dict = Depends(get_current_user)):
 
 @router.get("/groups")
 async def get_community_groups(current_user: dict = Depends(get_current_user)):
-    groups = [
-        {
-            "id": str(uuid.uuid4()),
-            "name": "Young Muslims Network",
-            "description": "Community for Muslim youth aged 18-35",
-            "members": 234,
-            "category": "Youth"
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "name": "Sisters Study Circle",
-            "description": "Islamic education and sisterhood",
-            "members": 89,
-            "category": "Education"
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "name": "Business Professionals",
-            "description": "Networking for Muslim entrepreneurs",
-            "members": 156,
-            "category": "Professional"
-        },
-        {
-            "id": str(uuid.uuid4()),
-            "name": "Family Support Network",
-            "description": "Support and resources for Muslim families",
-            "members": 67,
-            "category": "Family"
-        }
-    ]
-    return groups
\ No newline at end of file
+    joined = await db.group_members.find(
+        {"user_id": current_user["id"]}, {"_id": 0, "group_id": 1}
+    ).to_list(length=None)
+    joined = {membership["group_id"] for membership in joined}
+    return [dict(group, joined=group["id"] in joined) for group in MOCK_GROUPS]
+
+@router.post("/groups/{group_id}/join")
+async def join_group(group_id: str, current_user: dict = Depends(get_current_user)):
+    if group_id not in GROUPS_BY_ID:
+        raise HTTPException(status_code=404, detail="Group not found")
+    changed = await timelines.join(group_id, current_user["id"])
+    return {"message": "Joined group" if changed else "No change", "joined": True}
+
+@router.delete("/groups/{group_id}/join")
+async def leave_group(group_id: str, current_user: dict = Depends(get_current_user)):
+    changed = await timelines.leave(group_id, current_user["id"])
+    return {"message": "Left group" if changed else "No change", "joined": False}
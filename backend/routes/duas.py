@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
 from typing import List
-from server import db, get_current_user
+from server import db, stale_read_db, get_current_user, invalidate_user, trusted_response
 from models import DuaItem
 import uuid
 
@@ -63,7 +63,7 @@ async def get_duas(category: str = None, current_user: dict = Depends(get_curren
     duas = MOCK_DUAS
     if category:
         duas = [dua for dua in duas if dua["category"] == category]
-    return duas
+    return trusted_response(duas)
 
 @router.get("/categories")
 async def get_dua_categories(current_user: dict = Depends(get_current_user)):
@@ -84,11 +84,14 @@ async def favorite_dua(dua_id: str, current_user: dict = Depends(get_current_use
         {"id": current_user["id"]},
         {"$addToSet": {"favorite_duas": dua_id}}
     )
+    invalidate_user(current_user)
     return {"message": "Dua added to favorites"}
 
 @router.get("/favorites")
 async def get_favorite_duas(current_user: dict = Depends(get_current_user)):
-    user = await db.users.find_one({"id": current_user["id"]})
+    user = await stale_read_db.users.find_one({"id": current_user["id"]})
+    # A secondary may not have a just-registered user yet
+    user = user or current_user
     favorite_ids = user.get("favorite_duas", [])
     favorite_duas = [dua for dua in MOCK_DUAS if dua["id"] in favorite_ids]
     return favorite_duas
@@ -1,16 +1,45 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from server import db, get_current_user
-from models import Mosque
+from models import Mosque, TimetableBatch
+from geo import haversine_km, initial_bearing_deg
+from geo_cache import CellCache
+from geo_index import DistanceView
+from mosque_store import MemoryMosqueStore, MongoMosqueStore
+from fast_json import orjson
+from prayer_times import (
+    MAX_DATE,
+    MAX_YEAR,
+    PRAYERS,
+    calendar_days,
+    compute_utc_hours,
+    first_after,
+    format_clock,
+    format_duration,
+    local_minutes,
+    prayer_times,
+    timetable_rows,
+    utc_offset_hours,
+)
+import numpy as np
+import csv
+import io
+import json
+import logging
 import uuid
 import math
+import os
 
 router = APIRouter(prefix="/api/maps", tags=["maps"])
+logger = logging.getLogger(__name__)
 
-# Mock mosque data
+# Mock mosque data, seeded into an empty mosques collection; ids are stable across restarts
 MOCK_MOSQUES = [
     {
-        "id": str(uuid.uuid4()),
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, "mosque:Central Mosque")),
         "name": "Central Mosque",
         "address": "123 Islamic Center Rd, City",
         "latitude": 40.7128,
@@ -26,7 +55,7 @@ MOCK_MOSQUES = [
         }
     },
     {
-        "id": str(uuid.uuid4()),
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, "mosque:Masjid Al-Noor")),
         "name": "Masjid Al-Noor",
         "address": "456 Community Ave, Downtown",
         "latitude": 40.7589,
@@ -41,7 +70,7 @@ MOCK_MOSQUES = [
         }
     },
     {
-        "id": str(uuid.uuid4()),
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, "mosque:Islamic Cultural Center")),
         "name": "Islamic Cultural Center",
         "address": "789 Unity Blvd, Westside",
         "latitude": 40.6892,
@@ -58,8 +87,15 @@ MOCK_MOSQUES = [
     }
 ]
 
+# Kaaba coordinates
+KAABA_LAT = 21.4225
+KAABA_LNG = 39.8262
+
 def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two coordinates using Haversine formula"""
+    """Calculate distance between two coordinates using Haversine formula
+
+    Scalar reference version; bulk callers should use geo.haversine_km.
+    """
     R = 6371  # Earth's radius in kilometers
     
     lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
@@ -71,67 +107,290 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     
     return R * c
 
+# Mosques come from the mosques collection ($geoNear on a 2dsphere index);
+# MOSQUES_BACKEND=memory serves MOCK_MOSQUES from an in-process grid index
+MOSQUES_BACKEND = os.getenv("MOSQUES_BACKEND", "mongo")
+if MOSQUES_BACKEND == "memory":
+    mosque_store = MemoryMosqueStore(
+        MOCK_MOSQUES,
+        cell_degrees=float(os.getenv("MOSQUE_GRID_DEGREES", 0.1)),
+    )
+else:
+    mosque_store = MongoMosqueStore(db.mosques)
+
+async def seed_mosques():
+    """Seed MOCK_MOSQUES into an empty collection; run by the server after ensure_indexes"""
+    if isinstance(mosque_store, MongoMosqueStore):
+        try:
+            await mosque_store.seed(MOCK_MOSQUES)
+        except Exception as exc:
+            logger.error("Seeding mosques failed: %s", exc)
+
+# Listing without a location returns at most this many mosques
+MOSQUES_DEFAULT_PAGE_SIZE = int(os.getenv("MOSQUES_DEFAULT_PAGE_SIZE", 50))
+MOSQUES_MAX_PAGE_SIZE = int(os.getenv("MOSQUES_MAX_PAGE_SIZE", 200))
+MOSQUES_MAX_RADIUS_KM = float(os.getenv("MOSQUES_MAX_RADIUS_KM", 500))
+
 @router.get("/mosques", response_model=List[Mosque])
 async def get_nearby_mosques(
-    lat: float = None, 
-    lng: float = None, 
-    radius: float = 10.0,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius: float = Query(10.0, gt=0, le=MOSQUES_MAX_RADIUS_KM),
+    limit: Optional[int] = Query(None, ge=1),
     current_user: dict = Depends(get_current_user)
 ):
-    mosques = MOCK_MOSQUES.copy()
-    
-    if lat and lng:
-        # Calculate distances and filter by radius
-        for mosque in mosques:
-            distance = calculate_distance(lat, lng, mosque["latitude"], mosque["longitude"])
-            mosque["distance"] = round(distance, 2)
-        
-        # Filter by radius
-        mosques = [m for m in mosques if m.get("distance", 0) <= radius]
-        # Sort by distance
-        mosques.sort(key=lambda x: x.get("distance", 0))
-    
-    return mosques
+    limit = min(limit or MOSQUES_DEFAULT_PAGE_SIZE, MOSQUES_MAX_PAGE_SIZE)
+    if lat is None or lng is None:
+        return await mosque_store.list(limit)
+
+    matches = await mosque_store.nearby(lat, lng, radius, limit)
+    return [DistanceView(record, round(distance, 2)) for distance, record in matches]
+
+# Location-keyed prayer time cache; a cell is LOCATION_CACHE_CELL_DEGREES on a side.
+# Qibla isn't cached: near the Kaaba the bearing changes completely within a
+# cell, and computing it exactly costs less than the lookup.
+LOCATION_CACHE_CELL_DEGREES = float(os.getenv("LOCATION_CACHE_CELL_DEGREES", 0.01))
+LOCATION_CACHE_MAX_SIZE = int(os.getenv("LOCATION_CACHE_MAX_SIZE", 50000))
+prayer_cache = CellCache(LOCATION_CACHE_CELL_DEGREES, max_size=LOCATION_CACHE_MAX_SIZE)
+
+def resolve_timezone(timezone: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone {timezone!r}")
+
+def qibla(lat: float, lng: float):
+    return (
+        round(float(initial_bearing_deg(lat, lng, KAABA_LAT, KAABA_LNG)), 2),
+        round(float(haversine_km(lat, lng, KAABA_LAT, KAABA_LNG)), 2),
+    )
+
+def seconds_until_day_ends(day: date, tz: ZoneInfo, now: datetime) -> float:
+    return (datetime.combine(day + timedelta(days=1), time(), tzinfo=tz) - now).total_seconds()
+
+def cached_prayer_times(lat: float, lng: float, day: date, tz: ZoneInfo, now: datetime, **options):
+    """Prayer times for the location's grid cell, kept until that day ends locally"""
+    key = (day, tz.key, options["method"], options["asr"], options["high_latitude"])
+    return prayer_cache.get_or_compute(
+        lat, lng, key,
+        lambda cell_lat, cell_lng: prayer_times(cell_lat, cell_lng, day, tz, **options),
+        ttl=seconds_until_day_ends(day, tz, now),
+    )
 
 @router.get("/qibla-direction")
-async def get_qibla_direction(lat: float, lng: float, current_user: dict = Depends(get_current_user)):
+async def get_qibla_direction(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    current_user: dict = Depends(get_current_user)
+):
     """Calculate Qibla direction from given coordinates"""
-    # Kaaba coordinates
-    kaaba_lat = 21.4225
-    kaaba_lng = 39.8262
-    
-    # Convert to radians
-    lat1, lng1 = math.radians(lat), math.radians(lng)
-    lat2, lng2 = math.radians(kaaba_lat), math.radians(kaaba_lng)
-    
-    # Calculate bearing
-    dLng = lng2 - lng1
-    y = math.sin(dLng) * math.cos(lat2)
-    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dLng)
-    
-    bearing = math.atan2(y, x)
-    bearing = math.degrees(bearing)
-    bearing = (bearing + 360) % 360
-    
+    direction, distance = qibla(lat, lng)
     return {
-        "qibla_direction": round(bearing, 2),
-        "distance_km": round(calculate_distance(lat, lng, kaaba_lat, kaaba_lng), 2)
+        "qibla_direction": direction,
+        "distance_km": distance
     }
 
 @router.get("/prayer-times")
-async def get_prayer_times(lat: float, lng: float, current_user: dict = Depends(get_current_user)):
-    """Get prayer times for given location (mock data)"""
+async def get_prayer_times(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    date: Optional[date] = Query(None, le=MAX_DATE),
+    timezone: str = "UTC",
+    method: str = "mwl",
+    asr: str = "shafi",
+    high_latitude: str = "night_middle",
+    current_user: dict = Depends(get_current_user)
+):
+    """Calculate prayer times for a location and date from the sun's position"""
+    tz = resolve_timezone(timezone)
+    options = {"method": method, "asr": asr, "high_latitude": high_latitude}
+
+    now = datetime.now(tz)
+    today = now.date()
+    try:
+        times = cached_prayer_times(lat, lng, date or today, tz, now, **options)
+        upcoming, at = first_after(
+            [
+                cached_prayer_times(lat, lng, today, tz, now, **options),
+                cached_prayer_times(lat, lng, today + timedelta(days=1), tz, now, **options),
+            ],
+            now,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
     return {
         "location": {"latitude": lat, "longitude": lng},
-        "date": "2024-01-01",
-        "prayer_times": {
-            "fajr": "5:30 AM",
-            "sunrise": "6:45 AM",
-            "dhuhr": "12:30 PM",
-            "asr": "3:45 PM",
-            "maghrib": "6:15 PM",
-            "isha": "8:00 PM"
-        },
-        "next_prayer": "dhuhr",
-        "time_until_next": "2h 15m"
-    }
\ No newline at end of file
+        "date": (date or today).isoformat(),
+        "timezone": timezone,
+        "method": method,
+        "asr": asr,
+        "prayer_times": {name: format_clock(moment) for name, moment in times.items()},
+        "next_prayer": upcoming,
+        "time_until_next": format_duration(at - now) if at else None
+    }
+
+# Largest batch of mosques one timetable request may ask for
+TIMETABLE_MAX_MOSQUES = int(os.getenv("TIMETABLE_MAX_MOSQUES", 1000))
+TIMETABLE_FORMATS = ("json", "csv")
+
+def timetable_days(year: Optional[int], month: Optional[int], tz: ZoneInfo):
+    if month is not None and not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="month must be between 1 and 12")
+    return calendar_days(year if year is not None else datetime.now(tz).year, month)
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+def stream_timetables(head: dict, tables, format: str) -> StreamingResponse:
+    """Stream (fields, days, minutes) tables as one JSON document or one CSV.
+
+    Each table is rendered and sent as its own chunk, so the full response
+    is never held in memory at once.
+    """
+    if format == "csv":
+        def body():
+            field_names = None
+            for fields, days, minutes in tables:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, lineterminator="")
+                if field_names is None:
+                    field_names = list(fields)
+                    writer.writerow(field_names + ["date", *PRAYERS])
+                    yield buffer.getvalue() + "\n"
+                    buffer.seek(0)
+                    buffer.truncate()
+                # Only the per-table fields need quoting; dates and HH:MM never do
+                writer.writerow([fields[name] for name in field_names] + [""])
+                prefix = buffer.getvalue()
+                yield "".join(
+                    prefix + ",".join([row["date"]] + [row[name] or "" for name in PRAYERS]) + "\n"
+                    for row in timetable_rows(days, minutes)
+                )
+        return StreamingResponse(body(), media_type="text/csv")
+
+    def body():
+        yield dumps(head)[:-1] + b',"timetables":['
+        for i, (fields, days, minutes) in enumerate(tables):
+            rows = dumps(list(timetable_rows(days, minutes)))
+            yield (b"," if i else b"") + dumps(fields)[:-1] + b',"days":' + rows + b"}"
+        yield b"]}"
+    return StreamingResponse(body(), media_type="application/json")
+
+@router.get("/prayer-times/timetable")
+async def get_prayer_timetable(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    year: Optional[int] = Query(None, ge=1, le=MAX_YEAR),
+    month: Optional[int] = None,
+    timezone: str = "UTC",
+    method: str = "mwl",
+    asr: str = "shafi",
+    high_latitude: str = "night_middle",
+    format: str = "json",
+    current_user: dict = Depends(get_current_user)
+):
+    """Prayer times for every day of a month, or of the year when month is omitted"""
+    if format not in TIMETABLE_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be json or csv")
+    tz = resolve_timezone(timezone)
+    days = timetable_days(year, month, tz)
+    try:
+        minutes = local_minutes(lat, lng, days, tz, method=method, asr=asr, high_latitude=high_latitude)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    head = {"year": days[0].year, "month": month, "timezone": timezone, "method": method, "asr": asr}
+    tables = [({"latitude": lat, "longitude": lng}, days, minutes)]
+    return stream_timetables(head, tables, format)
+
+@router.post("/prayer-times/timetable/batch")
+async def get_prayer_timetables(batch: TimetableBatch, current_user: dict = Depends(get_current_user)):
+    """Timetables for many mosques in one call, computed together in a single pass"""
+    if batch.format not in TIMETABLE_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be json or csv")
+    if len(batch.mosque_ids) > TIMETABLE_MAX_MOSQUES:
+        raise HTTPException(status_code=400, detail=f"At most {TIMETABLE_MAX_MOSQUES} mosques per request")
+    tz = resolve_timezone(batch.timezone)
+    days = timetable_days(batch.year, batch.month, tz)
+
+    by_id = await mosque_store.by_ids(batch.mosque_ids)
+    mosques = [by_id[mosque_id] for mosque_id in dict.fromkeys(batch.mosque_ids) if mosque_id in by_id]
+    missing = [mosque_id for mosque_id in batch.mosque_ids if mosque_id not in by_id]
+
+    # (M, 1) coordinate columns broadcast against the date axis: one vectorized pass
+    lats = np.array([[mosque["latitude"]] for mosque in mosques], dtype=np.float64).reshape(-1, 1)
+    lngs = np.array([[mosque["longitude"]] for mosque in mosques], dtype=np.float64).reshape(-1, 1)
+    try:
+        minutes = local_minutes(
+            lats, lngs, days, tz, method=batch.method, asr=batch.asr, high_latitude=batch.high_latitude
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    head = {
+        "year": days[0].year,
+        "month": batch.month,
+        "timezone": batch.timezone,
+        "method": batch.method,
+        "asr": batch.asr,
+        "missing": missing,
+    }
+    tables = (
+        (
+            {"mosque_id": mosque["id"], "name": mosque["name"],
+             "latitude": mosque["latitude"], "longitude": mosque["longitude"]},
+            days,
+            {name: column[i] for name, column in minutes.items()},
+        )
+        for i, mosque in enumerate(mosques)
+    )
+    return stream_timetables(head, tables, batch.format)
+
+@router.get("/cell-error-bounds")
+async def get_cell_error_bounds(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    cell_degrees: Optional[float] = None,
+    date: Optional[date] = Query(None, le=MAX_DATE),
+    timezone: str = "UTC",
+    method: str = "mwl",
+    asr: str = "shafi",
+    high_latitude: str = "night_middle",
+    current_user: dict = Depends(get_current_user)
+):
+    """Worst-case error of serving the cell-centre answer anywhere in (lat, lng)'s cell.
+
+    Pass cell_degrees to evaluate a candidate resolution before configuring it.
+    """
+    if cell_degrees is not None and not 0 < cell_degrees <= 1:
+        raise HTTPException(status_code=400, detail="cell_degrees must be in (0, 1]")
+    cells = prayer_cache if cell_degrees is None else CellCache(cell_degrees, max_size=0)
+    tz = resolve_timezone(timezone)
+    day = date or datetime.now(tz).date()
+    days = np.array([day], dtype="datetime64[D]")
+    offsets = np.array([utc_offset_hours(day, tz)])
+
+    (center_lat, center_lng), points = cells.sample_points(lat, lng)
+    try:
+        exact = compute_utc_hours(center_lat, center_lng, days, offsets, method, asr, high_latitude)
+        samples = [compute_utc_hours(p_lat, p_lng, days, offsets, method, asr, high_latitude) for p_lat, p_lng in points]
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    # Minutes; None when the time doesn't exist somewhere in the cell
+    prayer_errors = {}
+    for name in exact:
+        diffs = np.abs(np.array([sample[name][0] for sample in samples]) - exact[name][0]) * 60
+        prayer_errors[name] = None if np.isnan(diffs).any() else round(float(diffs.max()), 3)
+
+    known = [error for error in prayer_errors.values() if error is not None]
+    return {
+        "cell_degrees": cells.cell_degrees,
+        "cell_center": {"latitude": center_lat, "longitude": center_lng},
+        "max_offset_km": round(cells.max_offset_km(lat), 3),
+        "prayer_time_minutes": prayer_errors,
+        "max_prayer_time_minutes": max(known) if known else None
+    }
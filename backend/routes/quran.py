@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from server import db, get_current_user
-from models import QuranVerse
-import uuid
+from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import List, Optional
+from pymongo import ReturnDocument
+from server import db, get_current_user, invalidate_user, trusted_response, user_cache
+from fast_json import PrecomputedJSON
+from models import QuranVerse, BookmarkBatch
+from quran_corpus import QuranCorpus, load_corpus
+from quran_search import load_or_build
+from progress_buffer import ProgressWriteBehind
+from reading_stats import ReadingStats
+from quran_metadata import SURAHS, JUZ, surah_verse_count
 from datetime import datetime
+import os
 
 router = APIRouter(prefix="/api/quran", tags=["quran"])
 
 # Mock Quran data
 MOCK_QURAN_DATA = [
     {
-        "id": str(uuid.uuid4()),
+        "id": "1:1",
         "surah_number": 1,
         "verse_number": 1,
         "arabic_text": "بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ",
@@ -18,7 +25,7 @@ MOCK_QURAN_DATA = [
         "urdu_translation": "اللہ کے نام سے جو بہت مہربان، نہایت رحم والا ہے"
     },
     {
-        "id": str(uuid.uuid4()),
+        "id": "1:2",
         "surah_number": 1,
         "verse_number": 2,
         "arabic_text": "ٱلْحَمْدُ لِلَّهِ رَبِّ ٱلْعَٰلَمِينَ",
@@ -26,7 +33,7 @@ MOCK_QURAN_DATA = [
         "urdu_translation": "تمام تعریف اللہ کے لیے ہے جو تمام جہانوں کا پالنے والا ہے"
     },
     {
-        "id": str(uuid.uuid4()),
+        "id": "2:1",
         "surah_number": 2,
         "verse_number": 1,
         "arabic_text": "الٓمٓ",
@@ -35,21 +42,94 @@ MOCK_QURAN_DATA = [
     }
 ]
 
+# Full corpus from QURAN_DATA_PATH, falling back to the sample verses above.
+# Prefer the memory-mapped store (see quran_corpus.py) so workers share pages.
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+QURAN_DATA_PATH = os.getenv("QURAN_DATA_PATH") or next(
+    (
+        path
+        for path in (os.path.join(DATA_DIR, "quran.bin"), os.path.join(DATA_DIR, "quran.json"))
+        if os.path.exists(path)
+    ),
+    "",
+)
+if os.path.exists(QURAN_DATA_PATH):
+    corpus = load_corpus(QURAN_DATA_PATH)
+else:
+    corpus = QuranCorpus(MOCK_QURAN_DATA)
+
+# Search index persisted next to the corpus so workers don't rebuild it on boot
+QURAN_SEARCH_INDEX_PATH = os.getenv(
+    "QURAN_SEARCH_INDEX_PATH", f"{QURAN_DATA_PATH}.search" if QURAN_DATA_PATH else ""
+)
+search_index = load_or_build(corpus, QURAN_SEARCH_INDEX_PATH)
+
+# Reading progress is coalesced per user and flushed in bulk, feeding the
+# reading analytics as it goes
+reading_stats = ReadingStats(
+    db.reading_events,
+    db.reading_stats,
+    max_step=int(os.getenv("READING_MAX_VERSES_PER_STEP", 20)),
+)
+progress_buffer = ProgressWriteBehind(
+    db.users,
+    flush_interval=float(os.getenv("PROGRESS_FLUSH_INTERVAL_SECONDS", 5)),
+    max_pending_users=int(os.getenv("PROGRESS_BUFFER_MAX_USERS", 10000)),
+    on_flushed=user_cache.invalidate,
+    analytics=reading_stats,
+)
+
+@router.on_event("startup")
+async def start_progress_buffer():
+    progress_buffer.start()
+
+@router.on_event("shutdown")
+async def flush_progress_buffer():
+    await progress_buffer.stop()
+
 @router.get("/verses", response_model=List[QuranVerse])
-async def get_quran_verses(surah: int = None, current_user: dict = Depends(get_current_user)):
+async def get_quran_verses(
+    surah: int = None,
+    from_verse: int = 1,
+    to_verse: Optional[int] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    current_user: dict = Depends(get_current_user)
+):
     if surah:
-        return [v for v in MOCK_QURAN_DATA if v["surah_number"] == surah]
-    return MOCK_QURAN_DATA[:10]  # Return first 10 verses
+        positions = corpus.surah_range(surah, from_verse, to_verse)
+    else:
+        positions = corpus.all_range()
+        if limit is None:
+            limit = 10  # Return first 10 verses
+
+    skip = max(skip, 0)
+    end = None if limit is None else skip + max(limit, 0)
+    return trusted_response(corpus.verses(positions[skip:end]))
+
+@router.get("/search")
+async def search_quran(q: str, skip: int = 0, limit: int = 20, current_user: dict = Depends(get_current_user)):
+    """Search translations and Arabic text. Supports "exact phrases" and prefix* terms."""
+    matches = search_index.search(q)
+    page = matches[max(skip, 0):max(skip, 0) + max(limit, 0)]
+    results = []
+    for position, score in page:
+        verse = corpus.verse_at(position)
+        verse["score"] = round(score, 4)
+        results.append(verse)
+    return trusted_response({"query": q, "total": len(matches), "results": results})
+
+# Static metadata, serialized once with a strong ETag for client revalidation
+SURAHS_RESPONSE = PrecomputedJSON(SURAHS, max_age=7 * 86400)
+JUZ_RESPONSE = PrecomputedJSON(JUZ, max_age=7 * 86400)
 
 @router.get("/surahs")
-async def get_surahs(current_user: dict = Depends(get_current_user)):
-    return [
-        {"number": 1, "name": "Al-Fatihah", "english_name": "The Opening", "verses": 7},
-        {"number": 2, "name": "Al-Baqarah", "english_name": "The Cow", "verses": 286},
-        {"number": 3, "name": "Al-Imran", "english_name": "The Family of Imran", "verses": 200},
-        {"number": 4, "name": "An-Nisa", "english_name": "The Women", "verses": 176},
-        {"number": 5, "name": "Al-Ma'idah", "english_name": "The Table", "verses": 120}
-    ]
+async def get_surahs(request: Request, current_user: dict = Depends(get_current_user)):
+    return SURAHS_RESPONSE.respond(request)
+
+@router.get("/juz")
+async def get_juz(request: Request, current_user: dict = Depends(get_current_user)):
+    return JUZ_RESPONSE.respond(request)
 
 @router.post("/bookmark")
 async def bookmark_verse(verse_id: str, current_user: dict = Depends(get_current_user)):
@@ -58,24 +138,76 @@ async def bookmark_verse(verse_id: str, current_user: dict = Depends(get_current
         {"id": current_user["id"]},
         {"$addToSet": {"bookmarked_verses": verse_id}}
     )
+    invalidate_user(current_user)
     return {"message": "Verse bookmarked successfully"}
 
 @router.get("/bookmarks")
-async def get_bookmarks(current_user: dict = Depends(get_current_user)):
-    user = await db.users.find_one({"id": current_user["id"]})
-    bookmarked_ids = user.get("bookmarked_verses", [])
-    bookmarked_verses = [v for v in MOCK_QURAN_DATA if v["id"] in bookmarked_ids]
-    return bookmarked_verses
+async def get_bookmarks(skip: int = 0, limit: Optional[int] = None, current_user: dict = Depends(get_current_user)):
+    # Read from the primary: the cached current_user can miss a bookmark just
+    # saved through another worker. Only the requested page is sent back.
+    skip = max(skip, 0)
+    if limit is not None and limit <= 0:
+        return trusted_response([])
+    user = await db.users.find_one(
+        {"id": current_user["id"]},
+        {"_id": 0, "id": 1, "bookmarked_verses": {"$slice": [skip, limit if limit is not None else 2**31 - 1]}},
+    )
+    # Bookmarks are kept in saved order and resolved through the corpus index
+    bookmarked_ids = (user or {}).get("bookmarked_verses", [])
+    bookmarked_verses = [corpus.get_by_id(verse_id) for verse_id in bookmarked_ids]
+    return trusted_response([v for v in bookmarked_verses if v is not None])
 
-@router.post("/progress")
-async def update_reading_progress(surah: int, verse: int, current_user: dict = Depends(get_current_user)):
-    progress_data = {
-        f"quran_progress.surah_{surah}": verse,
-        "last_read": datetime.utcnow()
+@router.post("/bookmarks/batch")
+async def batch_update_bookmarks(batch: BookmarkBatch, current_user: dict = Depends(get_current_user)):
+    """Add and remove many bookmarks in one write. Removals are applied first."""
+    add = list(dict.fromkeys(v for v in batch.add if corpus.position_of_id(v) is not None))
+    remove = list(dict.fromkeys(batch.remove))
+
+    # An update pipeline lets both changes hit the array in a single write,
+    # keeping existing order and appending new bookmarks at the end.
+    kept = {
+        "$filter": {
+            "input": {"$ifNull": ["$bookmarked_verses", []]},
+            "as": "v",
+            # Literal, so a user-supplied "$..." id is never parsed as an expression
+            "cond": {"$not": [{"$in": ["$$v", {"$literal": remove}]}]},
+        }
     }
-    
-    await db.users.update_one(
+    user = await db.users.find_one_and_update(
         {"id": current_user["id"]},
-        {"$set": progress_data}
+        [{"$set": {"bookmarked_verses": {"$let": {
+            "vars": {"kept": kept},
+            "in": {"$concatArrays": ["$$kept", {
+                "$filter": {"input": add, "as": "v", "cond": {"$not": [{"$in": ["$$v", "$$kept"]}]}}
+            }]},
+        }}}}],
+        projection={"_id": 0, "bookmarked_verses": 1},
+        return_document=ReturnDocument.BEFORE,
     )
+    invalidate_user(current_user)
+
+    before = user.get("bookmarked_verses", []) if user else []
+    removing = set(remove)
+    kept_ids = [v for v in before if v not in removing]
+    kept_set = set(kept_ids)
+    added = [v for v in add if v not in kept_set]
+    return {
+        "message": "Bookmarks updated",
+        "added": len(added),
+        "removed": len(before) - len(kept_ids),
+        "total": len(kept_ids) + len(added),
+    }
+
+@router.get("/stats")
+async def get_reading_stats(days: int = 7, current_user: dict = Depends(get_current_user)):
+    """Reading totals and the last `days` days of activity (updated on each progress flush)"""
+    return await reading_stats.get(current_user["id"], min(max(days, 1), 90))
+
+@router.post("/progress")
+async def update_reading_progress(surah: int, verse: int, current_user: dict = Depends(get_current_user)):
+    if not 1 <= surah <= len(SURAHS):
+        raise HTTPException(status_code=400, detail=f"surah must be between 1 and {len(SURAHS)}")
+    if not 1 <= verse <= surah_verse_count(surah):
+        raise HTTPException(status_code=400, detail=f"Surah {surah} has {surah_verse_count(surah)} verses")
+    progress_buffer.record(current_user, surah, verse, datetime.utcnow())
     return {"message": "Reading progress updated"}
\ No newline at end of file
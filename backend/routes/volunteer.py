@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List
 from server import db, get_current_user
 from models import VolunteerOpportunity
@@ -123,14 +123,15 @@ async def register_for_volunteer_opportunity(
     # Register user
     opportunity["volunteers_registered"] += 1
     
-    # In real app, save to database
     registration_data = {
         "id": str(uuid.uuid4()),
         "user_id": current_user["id"],
         "opportunity_id": opportunity_id,
         "registered_at": datetime.utcnow(),
-        "status": "confirmed"
+        "status": "confirmed",
+        "opportunity": {key: opportunity[key] for key in ("title", "organization", "date", "location")}
     }
+    await db.volunteer_registrations.insert_one(registration_data)
     
     return {
         "message": "Successfully registered for volunteer opportunity",
@@ -139,33 +140,19 @@ async def register_for_volunteer_opportunity(
     }
 
 @router.get("/my-registrations")
-async def get_my_volunteer_registrations(current_user: dict = Depends(get_current_user)):
-    # Mock user registrations
-    registrations = [
-        {
-            "registration_id": str(uuid.uuid4()),
-            "opportunity": {
-                "title": "Community Iftar Preparation",
-                "organization": "Central Mosque",
-                "date": datetime.utcnow() + timedelta(days=5),
-                "location": "Community Center Hall"
-            },
-            "status": "confirmed",
-            "registered_at": datetime.utcnow() - timedelta(days=2)
-        },
+async def get_my_volunteer_registrations(limit: int = Query(50, ge=1, le=200), current_user: dict = Depends(get_current_user)):
+    cursor = db.volunteer_registrations.find(
+        {"user_id": current_user["id"]}, {"_id": 0, "id": 1, "opportunity": 1, "status": 1, "registered_at": 1}
+    ).sort("registered_at", -1).limit(limit)
+    return [
         {
-            "registration_id": str(uuid.uuid4()),
-            "opportunity": {
-                "title": "Elderly Care Visit Program",
-                "organization": "Muslim Community Services",
-                "date": datetime.utcnow() + timedelta(days=7),
-                "location": "Various homes in the community"
-            },
-            "status": "confirmed",
-            "registered_at": datetime.utcnow() - timedelta(days=5)
+            "registration_id": registration["id"],
+            "opportunity": registration.get("opportunity"),
+            "status": registration["status"],
+            "registered_at": registration["registered_at"],
         }
+        for registration in await cursor.to_list(length=None)
     ]
-    return registrations
 
 @router.get("/categories")
 async def get_volunteer_categories(current_user: dict = Depends(get_current_user)):
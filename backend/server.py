@@ -1,7 +1,10 @@
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
@@ -10,10 +13,26 @@ from passlib.context import CryptContext
 import os
 from dotenv import load_dotenv
 import uuid
+import hashlib
+import time
+from cache import TTLCache
+from password_pool import PasswordPool, PasswordPoolBusy
+from indexes import ensure_indexes
+from pool_monitor import PoolStatsListener
+from fast_json import FastJSONResponse, orjson
+from pagination import NEXT_CURSOR_HEADER
 
 load_dotenv()
 
-app = FastAPI(title="MyEmaan Islamic App API", version="1.0.0")
+# orjson-backed responses, opt out with FAST_JSON_RESPONSES=false
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "true").lower() == "true" and orjson is not None
+JSON_RESPONSE_CLASS = FastJSONResponse if FAST_JSON_RESPONSES else JSONResponse
+
+app = FastAPI(
+    title="MyEmaan Islamic App API",
+    version="1.0.0",
+    default_response_class=JSON_RESPONSE_CLASS,
+)
 
 # CORS middleware
 app.add_middleware(
@@ -22,12 +41,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # MongoDB setup
 MONGO_URL = os.getenv("MONGO_URL")
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.myemaan_db
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "myemaan_db")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 30000))
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+# Used by read-heavy endpoints that tolerate slightly stale data
+MONGO_STALE_READ_PREFERENCE = os.getenv("MONGO_STALE_READ_PREFERENCE", "secondaryPreferred")
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+pool_stats = PoolStatsListener()
+client = AsyncIOMotorClient(
+    MONGO_URL,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    readPreference=MONGO_READ_PREFERENCE,
+    event_listeners=[pool_stats],
+)
+db = client[MONGO_DB_NAME]
+stale_read_db = client.get_database(
+    MONGO_DB_NAME, read_preference=READ_PREFERENCES[MONGO_STALE_READ_PREFERENCE]
+)
 
 # Security
 security = HTTPBearer()
@@ -36,6 +85,26 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
+# bcrypt runs on a bounded worker pool so it never blocks the event loop
+password_pool = PasswordPool(
+    pwd_context,
+    max_workers=int(os.getenv("PASSWORD_POOL_WORKERS", 4)),
+    max_pending=int(os.getenv("PASSWORD_POOL_MAX_PENDING", 64)),
+)
+
+# Authenticated user cache
+user_cache = TTLCache(
+    max_size=int(os.getenv("USER_CACHE_MAX_SIZE", 10000)),
+    ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", 60)),
+)
+
+# Verified JWT cache, keyed by a hash of the token
+JWT_CACHE_ENABLED = os.getenv("JWT_CACHE_ENABLED", "true").lower() == "true"
+token_cache = TTLCache(
+    max_size=int(os.getenv("JWT_CACHE_MAX_SIZE", 10000)),
+    ttl=float(os.getenv("JWT_CACHE_TTL_SECONDS", 300)),
+)
+
 # Pydantic models
 class User(BaseModel):
     id: str
@@ -179,30 +248,108 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def trusted_response(content, **kwargs):
+    """Return data we built ourselves without response_model re-validation.
+
+    FastAPI passes Response objects straight through, so hot read endpoints
+    skip the validate/serialize pass. Keep response_model on the route so the
+    OpenAPI schema stays accurate.
+    """
+    if not FAST_JSON_RESPONSES:
+        content = jsonable_encoder(content)
+    return JSON_RESPONSE_CLASS(content, **kwargs)
+
+def decode_access_token(token: str) -> dict:
+    """Decode a JWT, skipping signature verification for recently verified tokens"""
+    if not JWT_CACHE_ENABLED:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            return payload
+        token_cache.invalidate(key)
+        raise JWTError("Signature has expired.")
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    if "exp" in payload:
+        token_cache.set(key, payload, ttl=payload["exp"] - time.time())
+    return payload
+
+async def user_from_token(token: str, scope: Optional[str] = None) -> dict:
+    """The user a token was issued to; only tokens issued for ``scope`` are accepted"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("scope") != scope:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
+
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+
     user = await db.users.find_one({"email": email})
     if user is None:
         raise credentials_exception
+    user_cache.set(email, user)
     return user
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await user_from_token(credentials.credentials)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+# Browsers' EventSource can't set an Authorization header, so streaming
+# endpoints also take a short-lived token in the query string. It is scoped
+# to streams: get_current_user rejects it everywhere else.
+STREAM_TOKEN_SCOPE = "stream"
+STREAM_TOKEN_EXPIRE_SECONDS = int(os.getenv("STREAM_TOKEN_EXPIRE_SECONDS", 60))
+optional_security = HTTPBearer(auto_error=False)
+
+def create_stream_token(user: dict) -> str:
+    return create_access_token(
+        data={"sub": user["email"], "scope": STREAM_TOKEN_SCOPE},
+        expires_delta=timedelta(seconds=STREAM_TOKEN_EXPIRE_SECONDS),
+    )
+
+async def get_stream_user(
+    token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+):
+    """?token= from /api/auth/stream-token for browsers, or the usual bearer header"""
+    if token is not None:
+        return await user_from_token(token, STREAM_TOKEN_SCOPE)
+    if credentials is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return await user_from_token(credentials.credentials)
+
+def invalidate_user(user: dict):
+    """Drop a user from the auth cache after their document changes"""
+    user_cache.invalidate(user["email"])
+
+password_busy_exception = HTTPException(
+    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+    detail="Too many authentication requests, please retry shortly",
+    headers={"Retry-After": "1"},
+)
+
+async def verify_password(plain_password, hashed_password):
+    try:
+        return await password_pool.verify(plain_password, hashed_password)
+    except PasswordPoolBusy:
+        raise password_busy_exception
+
+async def get_password_hash(password):
+    try:
+        return await password_pool.hash(password)
+    except PasswordPoolBusy:
+        raise password_busy_exception
 
 # Include all route modules
 from routes import quran, maps, community, charity, duas, islamic_finance, volunteer, marriage
@@ -216,6 +363,19 @@ app.include_router(islamic_finance.router)
 app.include_router(volunteer.router)
 app.include_router(marriage.router)
 
+index_report = {}
+
+@app.on_event("startup")
+async def provision_indexes():
+    index_report.update(await ensure_indexes(db))
+    # Seeding upserts by id, so it runs once the unique id indexes exist
+    await maps.seed_mosques()
+    await community.seed_posts()
+
+@app.on_event("shutdown")
+async def shutdown_password_pool():
+    password_pool.shutdown()
+
 # Routes
 @app.get("/")
 async def root():
@@ -231,7 +391,7 @@ async def register_user(user_data: UserCreate):
     
     # Create new user
     user_id = str(uuid.uuid4())
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     
     user_doc = {
         "id": user_id,
@@ -265,7 +425,7 @@ async def register_user(user_data: UserCreate):
 @app.post("/api/auth/login", response_model=Token)
 async def login_user(user_data: UserLogin):
     user = await db.users.find_one({"email": user_data.email})
-    if not user or not verify_password(user_data.password, user["hashed_password"]):
+    if not user or not await verify_password(user_data.password, user["hashed_password"]):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -282,10 +442,15 @@ async def login_user(user_data: UserLogin):
         "user": user
     }
 
+@app.post("/api/auth/stream-token")
+async def get_stream_token(current_user: dict = Depends(get_current_user)):
+    """Token for opening an event stream with EventSource, valid for STREAM_TOKEN_EXPIRE_SECONDS"""
+    return {"token": create_stream_token(current_user), "expires_in": STREAM_TOKEN_EXPIRE_SECONDS}
+
 # User profile routes
 @app.get("/api/user/profile", response_model=User)
 async def get_user_profile(current_user: dict = Depends(get_current_user)):
-    return current_user
+    return quran.progress_buffer.merge(current_user)
 
 @app.put("/api/user/profile")
 async def update_user_profile(profile_data: dict, current_user: dict = Depends(get_current_user)):
@@ -293,8 +458,41 @@ async def update_user_profile(profile_data: dict, current_user: dict = Depends(g
         {"id": current_user["id"]}, 
         {"$set": profile_data}
     )
+    invalidate_user(current_user)
     return {"message": "Profile updated successfully"}
 
+# Monitoring routes
+def quran_corpus_stats():
+    return {
+        "verses": len(quran.corpus),
+        "memory_bytes": quran.corpus.memory_footprint(),
+    }
+
+# Accounts allowed to read /api/metrics; with none configured it is closed to everyone
+METRICS_ALLOWED_EMAILS = {email.strip() for email in os.getenv("METRICS_ALLOWED_EMAILS", "").split(",") if email.strip()}
+
+async def get_metrics_user(current_user: dict = Depends(get_current_user)):
+    if current_user["email"] not in METRICS_ALLOWED_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to read metrics")
+    return current_user
+
+@app.get("/api/metrics")
+async def get_metrics(current_user: dict = Depends(get_metrics_user)):
+    return {
+        "user_cache": user_cache.stats(),
+        "token_cache": dict(token_cache.stats(), enabled=JWT_CACHE_ENABLED),
+        "password_pool": password_pool.stats(),
+        "mongo_pool": pool_stats.stats(MONGO_MAX_POOL_SIZE),
+        "indexes": index_report,
+        "quran_corpus": quran_corpus_stats(),
+        "progress_buffer": quran.progress_buffer.stats(),
+        "prayer_cache": maps.prayer_cache.stats(),
+        "mosques": maps.mosque_store.stats(),
+        "like_counter": community.like_counter.stats(),
+        "feed_hub": community.feed_hub.stats(),
+        "timelines": community.timelines.stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
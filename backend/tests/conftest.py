@@ -0,0 +1,12 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing the routes builds the app; serve mosques from memory and never touch MongoDB
+os.environ.setdefault("MOSQUES_BACKEND", "memory")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+# Routes import from server, which includes them: load them the way the app does
+import server  # noqa: E402,F401
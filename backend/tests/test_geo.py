@@ -0,0 +1,83 @@
+import asyncio
+import math
+import random
+
+import numpy as np
+import pytest
+
+from geo import haversine_km, initial_bearing_deg
+from routes.maps import KAABA_LAT, KAABA_LNG, calculate_distance, get_qibla_direction
+
+
+def scalar_bearing(lat1, lng1, lat2, lng2):
+    # The per-point formula the qibla endpoint used before geo.py
+    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+    d_lng = lng2 - lng1
+    y = math.sin(d_lng) * math.cos(lat2)
+    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(d_lng)
+    return (math.degrees(math.atan2(y, x)) + 360) % 360
+
+
+def random_points(count, seed=7):
+    rng = random.Random(seed)
+    return [(rng.uniform(-89.9, 89.9), rng.uniform(-180, 180)) for _ in range(count)]
+
+
+def test_haversine_matches_scalar_distance():
+    origin = (40.7128, -74.0060)
+    points = random_points(5000)
+    lats = np.array([lat for lat, _ in points])
+    lngs = np.array([lng for _, lng in points])
+
+    vector = haversine_km(origin[0], origin[1], lats, lngs)
+
+    expected = [calculate_distance(origin[0], origin[1], lat, lng) for lat, lng in points]
+    np.testing.assert_allclose(vector, expected, rtol=1e-12, atol=1e-9)
+
+
+def test_haversine_scalar_and_degenerate_inputs():
+    assert float(haversine_km(10.0, 20.0, 10.0, 20.0)) == 0.0
+    # Antipodes: half the circumference, with no NaN from rounding past 1
+    assert float(haversine_km(0.0, 0.0, 0.0, 180.0)) == pytest.approx(math.pi * 6371.0)
+    assert float(haversine_km(51.5, -0.1, 48.9, 2.35)) == pytest.approx(calculate_distance(51.5, -0.1, 48.9, 2.35))
+
+
+def test_haversine_broadcasts_columns_against_rows():
+    origins = np.array([[0.0], [45.0]])
+    lats = np.array([0.0, 10.0, -10.0])
+    lngs = np.array([5.0, 5.0, 5.0])
+
+    grid = haversine_km(origins, 0.0, lats, lngs)
+
+    assert grid.shape == (2, 3)
+    for i, origin in enumerate(origins[:, 0]):
+        for j in range(3):
+            assert grid[i, j] == pytest.approx(calculate_distance(origin, 0.0, lats[j], lngs[j]))
+
+
+def test_bearing_matches_scalar_formula():
+    points = random_points(5000, seed=11)
+    lats = np.array([lat for lat, _ in points])
+    lngs = np.array([lng for _, lng in points])
+
+    vector = initial_bearing_deg(lats, lngs, KAABA_LAT, KAABA_LNG)
+
+    expected = np.array([scalar_bearing(lat, lng, KAABA_LAT, KAABA_LNG) for lat, lng in points])
+    # Compare on the circle so 359.9999 and 0.0001 count as equal
+    difference = np.abs((vector - expected + 180) % 360 - 180)
+    assert difference.max() < 1e-9
+    assert ((vector >= 0) & (vector < 360)).all()
+
+
+@pytest.mark.parametrize(
+    "lat, lng, direction",
+    [
+        (KAABA_LAT + 0.0024, KAABA_LNG, 180.0),  # just north of the Kaaba: face south
+        (KAABA_LAT - 0.0024, KAABA_LNG, 0.0),  # just south: face north
+        (KAABA_LAT, KAABA_LNG - 0.01, 90.0),  # just west: face east
+    ],
+)
+def test_qibla_is_exact_next_to_the_kaaba(lat, lng, direction):
+    result = asyncio.run(get_qibla_direction(lat, lng, current_user={}))
+
+    assert abs((result["qibla_direction"] - direction + 180) % 360 - 180) < 0.01
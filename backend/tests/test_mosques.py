@@ -0,0 +1,70 @@
+import asyncio
+import random
+
+from geo_index import DistanceView
+from routes.maps import MOCK_MOSQUES, calculate_distance, get_nearby_mosques
+
+
+def brute_force(lat, lng, radius, limit):
+    matches = sorted(
+        (calculate_distance(lat, lng, mosque["latitude"], mosque["longitude"]), mosque["id"])
+        for mosque in MOCK_MOSQUES
+    )
+    return [mosque_id for distance, mosque_id in matches if distance <= radius][:limit]
+
+
+def queries(count, seed=3):
+    rng = random.Random(seed)
+    return [
+        (
+            40.7 + rng.uniform(-0.2, 0.2),
+            -74.0 + rng.uniform(-0.2, 0.2),
+            rng.choice([1.0, 5.0, 10.0, 50.0]),
+            rng.choice([None, 1, 2]),
+        )
+        for _ in range(count)
+    ]
+
+
+def test_nearby_mosques_match_brute_force():
+    for lat, lng, radius, limit in queries(200):
+        results = asyncio.run(get_nearby_mosques(lat, lng, radius, limit, current_user={}))
+        assert [mosque["id"] for mosque in results] == brute_force(lat, lng, radius, limit)
+
+
+def test_overlapping_nearby_searches_are_independent():
+    """Many searches in flight at once each get their own distances, and
+    the shared index records are never modified."""
+    params = queries(500)
+    snapshot = [dict(mosque) for mosque in MOCK_MOSQUES]
+
+    async def run_all():
+        async def one(lat, lng, radius, limit):
+            await asyncio.sleep(0)
+            return await get_nearby_mosques(lat, lng, radius, limit, current_user={})
+
+        return await asyncio.gather(*(one(*query) for query in params))
+
+    results = asyncio.run(run_all())
+
+    for (lat, lng, radius, limit), result in zip(params, results):
+        assert [mosque["id"] for mosque in result] == brute_force(lat, lng, radius, limit)
+        for mosque in result:
+            assert isinstance(mosque, DistanceView)
+            assert mosque["distance"] == round(
+                calculate_distance(lat, lng, mosque["latitude"], mosque["longitude"]), 2
+            )
+            assert "distance" not in mosque.record
+    assert [dict(mosque) for mosque in MOCK_MOSQUES] == snapshot
+
+
+def test_nearby_search_is_paged_without_a_limit(monkeypatch):
+    from routes import maps
+
+    monkeypatch.setattr(maps, "MOSQUES_DEFAULT_PAGE_SIZE", 2)
+    results = asyncio.run(get_nearby_mosques(40.7128, -74.0060, 50.0, None, current_user={}))
+    assert [mosque["id"] for mosque in results] == brute_force(40.7128, -74.0060, 50.0, 2)
+
+    monkeypatch.setattr(maps, "MOSQUES_MAX_PAGE_SIZE", 1)
+    results = asyncio.run(get_nearby_mosques(40.7128, -74.0060, 50.0, 10, current_user={}))
+    assert [mosque["id"] for mosque in results] == brute_force(40.7128, -74.0060, 50.0, 1)
@@ -0,0 +1,23 @@
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+
+from prayer_times import MAX_DATE, MAX_YEAR, calendar_days
+from routes.maps import cached_prayer_times, seconds_until_day_ends
+
+
+def test_calendar_days_covers_month_and_year():
+    assert len(calendar_days(2024, 2)) == 29
+    assert calendar_days(2023, 12)[-1] == date(2023, 12, 31)
+    assert len(calendar_days(2024)) == 366
+
+
+def test_last_accepted_year_and_date_compute():
+    assert calendar_days(MAX_YEAR)[-1] == MAX_DATE
+    assert calendar_days(MAX_YEAR, 12)[-1] == MAX_DATE
+
+    tz = ZoneInfo("UTC")
+    now = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    assert seconds_until_day_ends(MAX_DATE, tz, now) > 0
+    options = {"method": "mwl", "asr": "shafi", "high_latitude": "night_middle"}
+    times = cached_prayer_times(40.0, -74.0, MAX_DATE, tz, now, **options)
+    assert times["fajr"] < times["dhuhr"] < times["isha"]
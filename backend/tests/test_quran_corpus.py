@@ -0,0 +1,102 @@
+import hashlib
+import multiprocessing
+import os
+
+import pytest
+
+from quran_corpus import MappedQuranCorpus, QuranCorpus, load_corpus, write_store
+from quran_metadata import surah_verse_count
+
+
+def sample_verses(text_repeat=1):
+    verses = []
+    for surah in range(1, 115):
+        for verse in range(1, surah_verse_count(surah) + 1):
+            row = {
+                "surah_number": surah,
+                "verse_number": verse,
+                "arabic_text": f"بِسْمِ ٱللَّهِ {surah}:{verse} " * text_repeat,
+                "english_translation": f"In the name of God, verse {surah}:{verse}. " * text_repeat,
+            }
+            # Some verses without an Urdu translation, stored as a missing field
+            if verse % 7:
+                row["urdu_translation"] = f"اللہ کے نام سے {surah}:{verse} " * text_repeat
+            verses.append(row)
+    return verses
+
+
+def test_store_round_trip(tmp_path):
+    verses = sample_verses()
+    corpus = QuranCorpus(reversed(verses))
+    path = str(tmp_path / "quran.bin")
+    write_store(corpus, path)
+
+    mapped = load_corpus(path)
+    assert isinstance(mapped, MappedQuranCorpus)
+    assert len(mapped) == len(corpus) == 6236
+    assert mapped.verses(mapped.all_range()) == corpus.verses(corpus.all_range())
+    assert [mapped.surah_length(surah) for surah in range(0, 116)] == [
+        corpus.surah_length(surah) for surah in range(0, 116)
+    ]
+    assert mapped.surah_range(2, 255, 257) == corpus.surah_range(2, 255, 257)
+    assert mapped.get_by_id("2:255") == corpus.get_by_id("2:255")
+    assert mapped.get_by_id("2:7")["urdu_translation"] is None
+    assert mapped.get_by_id("115:1") is None and mapped.get_by_id("2:287") is None
+
+
+def test_store_rejects_other_files(tmp_path):
+    path = tmp_path / "quran.bin"
+    path.write_bytes(b"QRN9" + bytes(64))
+    with pytest.raises(ValueError):
+        MappedQuranCorpus(str(path))
+
+
+def mapping_memory_kb(path):
+    """(Rss, Pss) in kB of this process's mappings of ``path``"""
+    rss = pss = 0
+    in_mapping = False
+    with open("/proc/self/smaps") as smaps:
+        for line in smaps:
+            fields = line.split()
+            if "-" in fields[0] and len(fields) >= 5:
+                in_mapping = fields[-1] == path
+            elif in_mapping and fields[0] == "Rss:":
+                rss += int(fields[1])
+            elif in_mapping and fields[0] == "Pss:":
+                pss += int(fields[1])
+    return rss, pss
+
+
+def worker(path, opened, done, results):
+    corpus = MappedQuranCorpus(path)
+    # Fault in every page of the store, as serving all verses would
+    hashlib.sha256(corpus._mmap).digest()
+    opened.wait()
+    results.put(mapping_memory_kb(path))
+    done.wait()
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps"), reason="needs Linux /proc/<pid>/smaps")
+def test_workers_share_the_mapped_store(tmp_path):
+    path = str(tmp_path / "quran.bin")
+    write_store(QuranCorpus(sample_verses(text_repeat=20)), path)
+    size_kb = os.path.getsize(path) // 1024
+
+    context = multiprocessing.get_context("fork")
+    opened, done = context.Barrier(2), context.Barrier(3)
+    results = context.Queue()
+    workers = [context.Process(target=worker, args=(path, opened, done, results)) for _ in range(2)]
+    for process in workers:
+        process.start()
+    try:
+        measurements = [results.get(timeout=60) for _ in workers]
+        done.wait(timeout=60)
+    finally:
+        for process in workers:
+            process.join(timeout=10)
+
+    for rss, pss in measurements:
+        # Each worker has the whole store resident, but only pays for half
+        # of it: the pages are the same page cache pages in both
+        assert rss >= size_kb * 0.9
+        assert pss <= rss * 0.6
@@ -0,0 +1,43 @@
+import os
+
+import quran_corpus
+from quran_corpus import QuranCorpus, load_corpus, write_store
+from quran_search import load_or_build
+
+VERSES = [
+    {"surah_number": 1, "verse_number": 1, "arabic_text": "بِسْمِ ٱللَّهِ", "english_translation": "In the name of Allah"},
+    {"surah_number": 1, "verse_number": 2, "arabic_text": "ٱلْحَمْدُ لِلَّهِ", "english_translation": "All praise is due to Allah"},
+    {"surah_number": 2, "verse_number": 1, "arabic_text": "الٓمٓ", "english_translation": "Alif Lam Meem"},
+]
+
+
+def test_saved_index_is_reused_without_decoding_the_store(tmp_path, monkeypatch):
+    store = str(tmp_path / "quran.bin")
+    write_store(QuranCorpus(VERSES), store)
+    index_path = store + ".search"
+    built = load_or_build(load_corpus(store), index_path)
+    assert [position for position, _ in built.search("praise")] == [1]
+
+    def no_decoding(self, position):
+        raise AssertionError("verse text decoded at startup")
+
+    monkeypatch.setattr(quran_corpus._MappedColumn, "__getitem__", no_decoding)
+    loaded = load_or_build(load_corpus(store), index_path)
+    assert loaded.fingerprint == built.fingerprint
+    assert [position for position, _ in loaded.search("praise")] == [1]
+
+
+def test_index_is_rebuilt_when_the_store_changes(tmp_path):
+    store = str(tmp_path / "quran.bin")
+    write_store(QuranCorpus(VERSES), store)
+    index_path = store + ".search"
+    load_or_build(load_corpus(store), index_path)
+
+    changed = [dict(verse) for verse in VERSES]
+    changed[2]["english_translation"] = "Alif Lam Meem, praise"
+    write_store(QuranCorpus(changed), store)
+    stat = os.stat(store)
+    os.utime(store, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    index = load_or_build(load_corpus(store), index_path)
+    assert sorted(position for position, _ in index.search("praise")) == [1, 2]
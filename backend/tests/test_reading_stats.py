@@ -0,0 +1,23 @@
+from reading_stats import read_steps
+
+
+def test_steps_forward_read_every_verse_passed():
+    read, position = read_steps(0, [3, 10, 12], max_step=20)
+    assert read == set(range(1, 13))
+    assert position == 12
+
+
+def test_jumps_only_read_the_verse_landed_on():
+    # Opening a bookmark at the end of Al-Baqarah reads one verse, not 286
+    read, position = read_steps(0, [286], max_step=20)
+    assert read == {286}
+    assert position == 286
+
+    read, position = read_steps(286, [1, 4, 100], max_step=20)
+    assert read == {1, 2, 3, 4, 100}
+    assert position == 100
+
+
+def test_going_back_is_not_a_step_forward():
+    read, _ = read_steps(50, [40, 41, 41], max_step=20)
+    assert read == {40, 41}
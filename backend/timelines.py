@@ -0,0 +1,232 @@
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from typing import Any, Dict, List, Optional, Set, Tuple
+import heapq
+
+from cache import TTLCache
+from pagination import KEYSET_SORT, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_filter
+
+
+def user_source(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+def group_source(group_id: str) -> str:
+    return f"group:{group_id}"
+
+
+class TimelineFanout:
+    """Per-user home feeds precomputed on write, with fan-out-on-read for big audiences.
+
+    A post is pushed to the timeline of everyone following its author or
+    belonging to its group (and to the author's own), each timeline being one
+    document holding the newest ``max_entries`` (created_at, post id) pairs.
+    A source -- user or group -- whose audience has reached ``max_fanout``
+    is skipped at write time instead; readers merge its recent posts in from
+    the posts collection, so one post never turns into millions of writes.
+    Audience sizes are counters in ``feed_sources``, kept by follow/join;
+    a follow or join also backfills the source's ``backfill`` newest posts,
+    and each entry records its source so unfollow/leave can remove them.
+    """
+
+    def __init__(
+        self, db, max_entries: int = 500, max_fanout: int = 10000, backfill: int = 20, batch_size: int = 1000
+    ):
+        self.db = db
+        self.max_entries = max_entries
+        self.max_fanout = max_fanout
+        self.backfill = backfill
+        self.batch_size = batch_size
+        self.posts_fanned_out = 0
+        self.timeline_writes = 0
+        self.sources_pulled = 0
+        self._pull_sources = TTLCache(max_size=1, ttl=30)
+
+    # Social graph
+
+    async def _add_edge(self, collection, edge: Dict[str, str], reader_id: str, source: str, posts_query: Dict[str, Any]) -> bool:
+        try:
+            await collection.insert_one(dict(edge, created_at=datetime.utcnow()))
+        except DuplicateKeyError:
+            return False
+        await self.db.feed_sources.update_one({"id": source}, {"$inc": {"audience": 1}}, upsert=True)
+        if source not in await self.pull_sources():
+            # Start the new timeline entries off with the source's latest posts
+            cursor = self.db.posts.find(posts_query, {"_id": 0, "id": 1, "created_at": 1}).sort(KEYSET_SORT)
+            recent = await cursor.limit(self.backfill).to_list(length=None)
+            if recent:
+                await self.db.timelines.bulk_write([self._push(reader_id, recent, source)])
+        return True
+
+    async def _remove_edge(self, collection, edge: Dict[str, str], reader_id: str, source: str) -> bool:
+        result = await collection.delete_one(edge)
+        if result.deleted_count == 0:
+            return False
+        await self.db.feed_sources.update_one({"id": source}, {"$inc": {"audience": -1}})
+        await self.db.timelines.update_one({"user_id": reader_id}, {"$pull": {"entries": {"source": source}}})
+        return True
+
+    async def follow(self, follower_id: str, followee_id: str) -> bool:
+        edge = {"follower_id": follower_id, "followee_id": followee_id}
+        return await self._add_edge(
+            self.db.follows, edge, follower_id, user_source(followee_id), {"user_id": followee_id}
+        )
+
+    async def unfollow(self, follower_id: str, followee_id: str) -> bool:
+        edge = {"follower_id": follower_id, "followee_id": followee_id}
+        return await self._remove_edge(self.db.follows, edge, follower_id, user_source(followee_id))
+
+    async def join(self, group_id: str, user_id: str) -> bool:
+        edge = {"group_id": group_id, "user_id": user_id}
+        return await self._add_edge(
+            self.db.group_members, edge, user_id, group_source(group_id), {"group_id": group_id}
+        )
+
+    async def leave(self, group_id: str, user_id: str) -> bool:
+        edge = {"group_id": group_id, "user_id": user_id}
+        return await self._remove_edge(self.db.group_members, edge, user_id, group_source(group_id))
+
+    async def pull_sources(self) -> Set[str]:
+        """Sources too big to fan out, re-read at most every 30 seconds"""
+        sources = self._pull_sources.get("all")
+        if sources is None:
+            cursor = self.db.feed_sources.find({"audience": {"$gte": self.max_fanout}}, {"_id": 0, "id": 1})
+            sources = {source["id"] for source in await cursor.to_list(length=None)}
+            self._pull_sources.set("all", sources)
+        return sources
+
+    # Write path
+
+    async def _audience(self, source: str) -> int:
+        document = await self.db.feed_sources.find_one({"id": source}, {"_id": 0, "audience": 1})
+        return document["audience"] if document else 0
+
+    def _push(self, user_id: str, posts: List[Dict[str, Any]], source: str) -> UpdateOne:
+        entries = [{"id": post["id"], "created_at": post["created_at"], "source": source} for post in posts]
+        return UpdateOne(
+            {"user_id": user_id},
+            {
+                "$push": {
+                    "entries": {
+                        "$each": entries,
+                        "$sort": {"created_at": -1, "id": -1},
+                        "$slice": self.max_entries,
+                    }
+                }
+            },
+            upsert=True,
+        )
+
+    async def fan_out(self, post: Dict[str, Any]) -> Dict[str, Any]:
+        """Push a new post onto its audience's timelines; returns what it did"""
+        sources = [(user_source(post["user_id"]), self.db.follows, {"followee_id": post["user_id"]}, "follower_id")]
+        if post.get("group_id"):
+            sources.append(
+                (group_source(post["group_id"]), self.db.group_members, {"group_id": post["group_id"]}, "user_id")
+            )
+
+        delivered = {post["user_id"]}
+        batch = [self._push(post["user_id"], [post], user_source(post["user_id"]))]
+        pulled = []
+        for source, collection, query, recipient_field in sources:
+            if await self._audience(source) >= self.max_fanout:
+                pulled.append(source)
+                continue
+            async for edge in collection.find(query, {"_id": 0, recipient_field: 1}):
+                recipient = edge[recipient_field]
+                if recipient in delivered:
+                    continue
+                delivered.add(recipient)
+                batch.append(self._push(recipient, [post], source))
+                if len(batch) >= self.batch_size:
+                    await self.db.timelines.bulk_write(batch, ordered=False)
+                    batch = []
+        if batch:
+            await self.db.timelines.bulk_write(batch, ordered=False)
+
+        timeline_writes = len(delivered)
+        self.posts_fanned_out += 1
+        self.timeline_writes += timeline_writes
+        self.sources_pulled += len(pulled)
+        return {"timeline_writes": timeline_writes, "pulled_sources": pulled}
+
+    # Read path
+
+    async def _pulled_sources_of(self, user_id: str) -> Tuple[List[str], List[str]]:
+        """(user ids, group ids) this reader follows that are read at query time"""
+        pull = await self.pull_sources()
+        if not pull:
+            return [], []
+        users = [source[len("user:"):] for source in pull if source.startswith("user:")]
+        groups = [source[len("group:"):] for source in pull if source.startswith("group:")]
+        followed, joined = [], []
+        if users:
+            cursor = self.db.follows.find(
+                {"follower_id": user_id, "followee_id": {"$in": users}}, {"_id": 0, "followee_id": 1}
+            )
+            followed = [edge["followee_id"] for edge in await cursor.to_list(length=None)]
+        if groups:
+            cursor = self.db.group_members.find(
+                {"user_id": user_id, "group_id": {"$in": groups}}, {"_id": 0, "group_id": 1}
+            )
+            joined = [edge["group_id"] for edge in await cursor.to_list(length=None)]
+        return followed, joined
+
+    async def read(
+        self, user_id: str, before: Optional[str], limit: int
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """One page of the user's home feed, newest first, as posts plus next-page headers"""
+        cutoff = decode_cursor(before) if before else None
+
+        timeline = await self.db.timelines.find_one({"user_id": user_id}, {"_id": 0, "entries": 1})
+        pushed = [
+            (entry["created_at"], entry["id"])
+            for entry in (timeline or {}).get("entries", [])
+            if cutoff is None or (entry["created_at"], entry["id"]) < cutoff
+        ][: limit + 1]
+
+        followed, joined = await self._pulled_sources_of(user_id)
+        pulled = []
+        if followed or joined:
+            clauses = []
+            if followed:
+                clauses.append({"user_id": {"$in": followed}})
+            if joined:
+                clauses.append({"group_id": {"$in": joined}})
+            query = {"$or": clauses} if len(clauses) > 1 else clauses[0]
+            if before:
+                query = keyset_filter(before, query)
+            cursor = self.db.posts.find(query, {"_id": 0, "created_at": 1, "id": 1}).sort(KEYSET_SORT).limit(limit + 1)
+            pulled = [(post["created_at"], post["id"]) for post in await cursor.to_list(length=None)]
+
+        merged = []
+        seen = set()
+        for created_at, post_id in heapq.merge(pushed, pulled, reverse=True):
+            if post_id not in seen:
+                seen.add(post_id)
+                merged.append((created_at, post_id))
+        page = merged[:limit]
+
+        headers = {}
+        if len(merged) > limit:
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(*page[-1])
+        if not page:
+            return [], headers
+
+        ids = [post_id for _, post_id in page]
+        posts = await self.db.posts.find({"id": {"$in": ids}}, {"_id": 0}).to_list(length=None)
+        by_id = {post["id"]: post for post in posts}
+        # Posts deleted since they were pushed simply drop out of the page
+        return [by_id[post_id] for post_id in ids if post_id in by_id], headers
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_entries": self.max_entries,
+            "max_fanout": self.max_fanout,
+            "posts_fanned_out": self.posts_fanned_out,
+            "timeline_writes": self.timeline_writes,
+            "write_amplification": round(self.timeline_writes / self.posts_fanned_out, 2)
+            if self.posts_fanned_out else 0.0,
+            "sources_pulled": self.sources_pulled,
+        }
@@ -0,0 +1,54 @@
+from typing import Any, Dict, Optional
+import asyncio
+
+
+class WriteBehind:
+    """Base for in-memory change buffers written to MongoDB in the background.
+
+    Subclasses collect changes in ``_pending`` (keyed by document), call
+    ``_added`` after each one and implement ``flush``, which swaps out
+    ``_pending`` and keeps the batch in ``_flushing`` while it is written.
+    The loop here runs ``flush`` every ``flush_interval`` seconds, or as
+    soon as ``max_pending`` keys are waiting.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.documents_written = 0
+        self.flushes = 0
+        self._pending: Dict[str, Any] = {}
+        self._flushing: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def _added(self):
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def flush(self):
+        raise NotImplementedError
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop, letting an in-flight flush finish, then flush the rest"""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
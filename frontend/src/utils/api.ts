@@ -85,6 +85,35 @@ export const communityAPI = {
     }),
   getEvents: () => apiCall('/api/community/events'),
   getGroups: () => apiCall('/api/community/groups'),
+  // Live feed over Server-Sent Events. EventSource can't send the bearer
+  // header, so every (re)connect first fetches a short-lived stream token.
+  // Returns a function that closes the stream.
+  openFeedStream: (onEvent: (type: string, data: any) => void) => {
+    let source: EventSource | null = null
+    let closed = false
+    const reconnect = () => {
+      source?.close()
+      if (!closed) setTimeout(connect, 3000)
+    }
+    const connect = async () => {
+      try {
+        const { token } = await apiCall('/api/auth/stream-token', { method: 'POST' })
+        if (closed) return
+        source = new EventSource(`${API_BASE_URL}/api/community/stream?token=${encodeURIComponent(token)}`)
+        for (const type of ['post', 'likes', 'comment', 'resync']) {
+          source.addEventListener(type, (event) => onEvent(type, JSON.parse((event as MessageEvent).data)))
+        }
+        source.onerror = reconnect
+      } catch {
+        reconnect()
+      }
+    }
+    connect()
+    return () => {
+      closed = true
+      source?.close()
+    }
+  },
 }
 
 export const charityAPI = {